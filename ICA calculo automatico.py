@@ -88,18 +88,17 @@ def qi_conductividad(x):
     else: return 30
 
 
-# --- Pesos ---
-pesos = {
-    'ph': 0.08, 'temperatura': 0.06, 'co2': 0.05, 'od': 0.12, 'salinidad': 0.05,
-    'alc_fenolftaleina': 0.04, 'alc_total': 0.04, 'nitrito': 0.05,
-    'nitrato': 0.05, 'fosfato': 0.08, 'turbidez': 0.08, 'acidez_nm': 0.04,
-    'acidez_fp': 0.04, 'sst': 0.09, 'conductividad': 0.08
-}
+# --- Pesos y columnas (compartidos con el cálculo vectorizado) ---
+from ica_vectorizado import calcular_ica_lote, columnas_ica, pesos
 
 # --- Importaciones ---
 import pandas as pd
 import os
 
+from cache_resultados import DIRECTORIO_CACHE
+from cargadores import cargar_columnas
+from instrumentacion import metricas, perfilar
+
 def procesar_archivo_excel():
     try:
         # Obtener la ruta a Documents
@@ -111,7 +110,14 @@ def procesar_archivo_excel():
         # Verificar si el archivo existe
         if os.path.exists(ruta_archivo):
             print("Archivo encontrado!")
-            df = pd.read_excel(ruta_archivo)
+            try:
+                # Lectura por bloques en modo solo lectura, columnas ya en float64
+                df = pd.DataFrame(cargar_columnas(ruta_archivo, columnas_ica, filtrar_nan=False,
+                                                   directorio_cache=DIRECTORIO_CACHE))
+            except ValueError as e:
+                print(f"\nError: {e}")
+                print("Columnas esperadas: " + ", ".join(columnas_ica))
+                return None
             print("\nColumnas encontradas:")
             print(df.columns.tolist())
             return df
@@ -172,19 +178,22 @@ def main():
         
     print("\nProcesando datos...")
     
-    # Procesar cada fila del DataFrame
+    # Calcular todas las muestras a la vez
+    try:
+        ica, calidad, qi = calcular_ica_lote(df)
+    except KeyError as e:
+        print(f"\nError: No se encontró la columna {str(e)}")
+        print("Columnas esperadas: " + ", ".join(columnas_ica))
+        return
+    
     resultados = []
-    for index, row in df.iterrows():
-        print(f"\nProcesando muestra {index + 1}...")
-        ica, calidad, qi = calcular_ica_muestra(row)
-        
-        if ica is not None:
-            resultados.append({
-                'Muestra': index + 1,
-                'ICA': ica,
-                'Calidad': calidad,
-                'Qi': qi
-            })
+    for i in range(len(ica)):
+        resultados.append({
+            'Muestra': i + 1,
+            'ICA': ica[i],
+            'Calidad': calidad[i],
+            'Qi': dict(zip(pesos, qi[i]))
+        })
     
     # Mostrar resultados
     if resultados:
@@ -206,4 +215,6 @@ def main():
             print(f"Categoría: {r['Calidad']}")
 
 if __name__ == "__main__":
-    main()
+    with perfilar():
+        main()
+    metricas.emitir()
@@ -1,12 +1,175 @@
-import pandas as pd
-import matplotlib.pyplot as plt
+import argparse
+import copy
+import math
 import os
 
+import numpy as np
+
+from cache_resultados import DIRECTORIO_CACHE, CacheResultados
+from cargadores import cargar_xy
+from instrumentacion import contar, etapa, metricas, perfilar
+from modelos import ModeloPolinomial
+from reportes import diezmar, generar_reporte, pyplot
+
+BACKENDS_LAGRANGE = ('python', 'numpy', 'newton')
+BASES_REGRESION = ('monomial', 'chebyshev')
+# Ejecuciones desatendidas (cron, sin pantalla): guardar las gráficas en vez de abrir ventanas
+DIRECTORIO_GRAFICAS = os.environ.get('INTERPOLACION_GRAFICAS')
+FORMATOS_GRAFICAS = tuple(f for f in os.environ.get('INTERPOLACION_FORMATOS', 'png').split(',') if f)
+
+
+def pesos_lagrange(x_eval, nodos):
+    """Pesos de Lagrange L_i(x_eval) de cada fila de nodos (m, k); y_interp = Σ L_i·y_i"""
+    k = nodos.shape[1]
+    diagonal = np.eye(k, dtype=bool)
+    denominador = nodos[:, :, None] - nodos[:, None, :]
+    denominador[:, diagonal] = 1.0
+    factores = (np.asarray(x_eval, dtype=np.float64)[:, None] - nodos)[:, None, :] / denominador
+    factores[:, diagonal] = 1.0
+    return factores.prod(axis=2)
+
+
+def error_porcentual(y_real, y_interp):
+    """Error porcentual vectorizado con las reglas de calcular_error_grado.
+    
+    Devuelve el error (100 % si la estimación no es finita) y la máscara de
+    estimaciones válidas.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        error = np.where(np.abs(y_real) > 1e-12,
+                         np.abs((y_real - y_interp) / y_real) * 100,
+                         np.where(np.abs(y_interp) < 1e-12, 0.0, 100.0))
+    validos = np.isfinite(error)
+    return np.where(validos, error, 100.0), validos
+
+
+class IndiceNodos:
+    """Índice ordenado de los valores distintos de x.
+    
+    Ordena y agrupa x una sola vez (tabla de duplicados con tolerancia 1e-12)
+    para devolver los k nodos distintos más cercanos a un punto excluido o a
+    una x de consulta en O(log n + k).
+    """
+    
+    def __init__(self, x):
+        x = np.asarray(x, dtype=np.float64)
+        self.n = len(x)
+        orden = np.argsort(x, kind='stable')
+        nuevo = np.empty(self.n, dtype=bool)
+        nuevo[:1] = True
+        nuevo[1:] = np.diff(x[orden]) >= 1e-12
+        
+        # grupo[i]: posición del valor de x[i] en la tabla ordenada de valores distintos
+        self.grupo = np.empty(self.n, dtype=np.intp)
+        self.grupo[orden] = np.cumsum(nuevo) - 1
+        
+        # Primer y segundo índice (orden de archivo) de cada valor distinto
+        por_grupo = np.lexsort((np.arange(self.n), self.grupo))
+        inicio = np.flatnonzero(np.diff(self.grupo[por_grupo], prepend=-1))
+        self.representante = por_grupo[inicio]
+        self.conteo = np.diff(np.r_[inicio, self.n])
+        self.segundo = np.where(self.conteo > 1, por_grupo[np.minimum(inicio + 1, self.n - 1)], -1)
+        self.x_distintos = x[self.representante]
+    
+    def __len__(self):
+        return len(self.x_distintos)
+    
+    def _nodo(self, posicion, excluir):
+        """Índice de un punto con el valor distinto dado, evitando el excluido"""
+        indice = self.representante[posicion]
+        return self.segundo[posicion] if indice == excluir else indice
+    
+    def vecinos(self, x_eval, k, excluir=None):
+        """Índices de los k nodos distintos más cercanos a x_eval.
+        
+        Si se indica excluir, x_eval es la x de ese punto y el punto no se usa
+        (su valor sigue disponible si está repetido). Puede devolver menos de
+        k índices si no hay suficientes valores distintos.
+        """
+        if excluir is not None:
+            posicion = self.grupo[excluir]
+            seleccion = [] if self.conteo[posicion] == 1 else [self._nodo(posicion, excluir)]
+            izquierda, derecha = posicion - 1, posicion + 1
+        else:
+            seleccion = []
+            derecha = int(np.searchsorted(self.x_distintos, x_eval))
+            izquierda = derecha - 1
+        
+        total = len(self.x_distintos)
+        while len(seleccion) < k and (izquierda >= 0 or derecha < total):
+            if derecha >= total or (izquierda >= 0 and
+                    x_eval - self.x_distintos[izquierda] <= self.x_distintos[derecha] - x_eval):
+                seleccion.append(self._nodo(izquierda, excluir))
+                izquierda -= 1
+            else:
+                seleccion.append(self._nodo(derecha, excluir))
+                derecha += 1
+        
+        return [int(i) for i in seleccion]
+    
+    def matriz_vecinos(self, x, k):
+        """Vecinos de dejar-uno-fuera para todos los puntos a la vez.
+        
+        Devuelve la matriz (n, k) de índices, con cada fila ordenada del nodo
+        más cercano al más lejano, y cuántos nodos válidos tiene cada fila (los
+        válidos van primero).
+        """
+        x = np.asarray(x, dtype=np.float64)
+        puntos = np.arange(self.n)
+        posicion = self.grupo[:, None]
+        candidatos = posicion + np.arange(-k, k + 1)
+        validos = (candidatos >= 0) & (candidatos < len(self.x_distintos))
+        validos &= ~((candidatos == posicion) & (self.conteo[posicion] == 1))
+        candidatos = np.clip(candidatos, 0, len(self.x_distintos) - 1)
+        
+        distancia = np.where(validos, np.abs(self.x_distintos[candidatos] - x[:, None]), np.inf)
+        cercanos = np.argsort(distancia, axis=1, kind='stable')[:, :k]
+        elegidos = np.take_along_axis(candidatos, cercanos, axis=1)
+        n_validos = np.take_along_axis(validos, cercanos, axis=1).sum(axis=1)
+        
+        indices = self.representante[elegidos]
+        propio = indices == puntos[:, None]
+        indices[propio] = self.segundo[elegidos[propio]]
+        return indices, n_validos
+    
+    def matriz_cercanos(self, x_eval, k):
+        """vecinos(x_eval, k) para muchas x de consulta a la vez (mismo formato que matriz_vecinos)"""
+        x_eval = np.asarray(x_eval, dtype=np.float64)
+        total = len(self.x_distintos)
+        if total == 0:
+            return np.zeros((len(x_eval), k), dtype=np.intp), np.zeros(len(x_eval), dtype=np.intp)
+        
+        # Los candidatos van de izquierda a derecha: en empates gana el de la izquierda, como en vecinos
+        candidatos = np.searchsorted(self.x_distintos, x_eval)[:, None] + np.arange(-k, k)
+        validos = (candidatos >= 0) & (candidatos < total)
+        candidatos = np.clip(candidatos, 0, total - 1)
+        
+        distancia = np.where(validos, np.abs(self.x_distintos[candidatos] - x_eval[:, None]), np.inf)
+        cercanos = np.argsort(distancia, axis=1, kind='stable')[:, :k]
+        elegidos = np.take_along_axis(candidatos, cercanos, axis=1)
+        n_validos = np.take_along_axis(validos, cercanos, axis=1).sum(axis=1)
+        return self.representante[elegidos], n_validos
+
+
 class InterpolacionLagrange:
-    def __init__(self, x, y):
+    def __init__(self, x, y, backend='python', tam_bloque=65536, cache=None):
+        if backend not in BACKENDS_LAGRANGE:
+            raise ValueError(f"Backend desconocido: {backend!r} (opciones: {BACKENDS_LAGRANGE})")
         self.x = x
         self.y = y
         self.n = len(x)
+        self.backend = backend
+        self.tam_bloque = tam_bloque
+        self._indice = None
+        self.cache = cache
+        self._huella = None
+    
+    @property
+    def indice(self):
+        """Índice ordenado de nodos, construido la primera vez que se usa"""
+        if self._indice is None:
+            self._indice = IndiceNodos(self.x)
+        return self._indice
     
     def interpolar_punto(self, x_eval, indices_puntos):
         """Interpola un punto usando los índices especificados"""
@@ -27,111 +190,233 @@ class InterpolacionLagrange:
         
         return resultado
     
+    def baricentrica(self, indices_puntos):
+        """Devuelve el interpolador baricéntrico sobre los índices especificados"""
+        return InterpolacionBaricentrica(self.x, self.y, indices_puntos, self.tam_bloque)
+    
     def obtener_puntos_para_grado(self, punto_excluir, grado):
-        """Obtiene puntos únicos para interpolación"""
+        """Obtiene los puntos únicos más cercanos al punto excluido"""
         n_puntos_necesarios = grado + 1
         
         if self.n <= n_puntos_necesarios:
             return [i for i in range(self.n) if i != punto_excluir]
         
-        puntos_seleccionados = []
-        x_vistos = []
-        
-        for i in range(self.n):
-            if i == punto_excluir:
-                continue
-                
-            es_unico = True
-            for x_visto in x_vistos:
-                if abs(self.x[i] - x_visto) < 1e-12:
-                    es_unico = False
-                    break
+        return self.indice.vecinos(self.x[punto_excluir], n_puntos_necesarios, excluir=punto_excluir)
+    
+    def obtener_puntos_cercanos(self, x_eval, grado):
+        """Obtiene los grado+1 puntos únicos más cercanos a una x de consulta"""
+        return self.indice.vecinos(x_eval, grado + 1)
+    
+    def _calcular_error_punto(self, i, grado):
+        """Calcula (error, y_interpolado) dejando fuera el punto i"""
+        try:
+            puntos_interpolacion = self.obtener_puntos_para_grado(i, grado)
             
-            if es_unico:
-                puntos_seleccionados.append(i)
-                x_vistos.append(self.x[i])
-                
-            if len(puntos_seleccionados) == n_puntos_necesarios:
-                break
-        
-        if len(puntos_seleccionados) < n_puntos_necesarios:
-            puntos_seleccionados = []
-            for i in range(min(n_puntos_necesarios, self.n)):
-                if i != punto_excluir:
-                    puntos_seleccionados.append(i)
-        
-        return puntos_seleccionados
+            if len(puntos_interpolacion) < grado + 1:
+                return 100.0, self.y[i]
+            
+            y_interp = self.interpolar_punto(self.x[i], puntos_interpolacion)
+            
+            if abs(self.y[i]) > 1e-12:
+                error = abs((self.y[i] - y_interp) / self.y[i]) * 100
+            else:
+                error = 0.0 if abs(y_interp) < 1e-12 else 100.0
+            
+            return error, y_interp
+            
+        except Exception:
+            return 100.0, self.y[i]
+    
+    def _memorizar(self, partes, calcular):
+        """Usa la caché de resultados (si hay) con clave huella de x, y + partes"""
+        if self.cache is None:
+            return calcular()
+        if self._huella is None:
+            self._huella = self.cache.huella(self.x, self.y)
+        return self.cache.memorizar((self._huella,) + partes, calcular)
     
     def calcular_error_grado(self, grado):
         """Calcula error para un grado específico"""
-        errores = []
-        y_interpolados = []
-        
-        for i in range(self.n):
-            try:
-                puntos_interpolacion = self.obtener_puntos_para_grado(i, grado)
-                
-                if len(puntos_interpolacion) < grado + 1:
-                    errores.append(100.0)
-                    y_interpolados.append(self.y[i])
-                    continue
-                
-                y_interp = self.interpolar_punto(self.x[i], puntos_interpolacion)
-                y_interpolados.append(y_interp)
-                
-                if abs(self.y[i]) > 1e-12:
-                    error = abs((self.y[i] - y_interp) / self.y[i]) * 100
-                else:
-                    error = 0.0 if abs(y_interp) < 1e-12 else 100.0
-                
+        return self._memorizar(('lagrange', self.backend, grado),
+                               lambda: self._calcular_error_grado(grado))
+    
+    def _calcular_error_grado(self, grado):
+        if self.backend == 'newton':
+            return self._calcular_errores_newton([grado])[grado]
+        
+        with etapa(f'lagrange.{self.backend}'):
+            # Un conjunto de vecinos (stencil) por punto y por grado
+            contar('lagrange.puntos', self.n)
+            contar('lagrange.stencils', self.n)
+            if self.backend == 'numpy':
+                return self._calcular_error_grado_numpy(grado)
+            
+            errores = []
+            y_interpolados = []
+            
+            for i in range(self.n):
+                error, y_interp = self._calcular_error_punto(i, grado)
                 errores.append(error)
-                
-            except Exception:
-                errores.append(100.0)
-                y_interpolados.append(self.y[i])
+                y_interpolados.append(y_interp)
+            
+            # Arrays como los demás backends (y como los devuelve la caché en disco)
+            return (np.asarray(self.x, dtype=np.float64), np.array(errores, dtype=np.float64),
+                    np.array(y_interpolados, dtype=np.float64))
+    
+    # ----- Backend vectorizado (NumPy) -----
+    
+    def _interpolar_lote(self, x_eval, indices, tam_bloque=None):
+        """Evalúa en bloque el polinomio de Lagrange de cada fila de indices en x_eval"""
+        x = np.asarray(self.x, dtype=np.float64)
+        y = np.asarray(self.y, dtype=np.float64)
+        x_eval = np.asarray(x_eval, dtype=np.float64)
+        tam_bloque = tam_bloque or self.tam_bloque
+        resultado = np.empty(len(indices), dtype=np.float64)
+        
+        for inicio in range(0, len(indices), tam_bloque):
+            bloque = slice(inicio, inicio + tam_bloque)
+            pesos = pesos_lagrange(x_eval[bloque], x[indices[bloque]])
+            resultado[bloque] = (y[indices[bloque]] * pesos).sum(axis=1)
         
-        return self.x, errores, y_interpolados
+        return resultado
     
-    def mostrar_resultados(self):
+    def _calcular_error_grado_numpy(self, grado):
+        """Versión vectorizada de calcular_error_grado (devuelve arrays)"""
+        x = np.asarray(self.x, dtype=np.float64)
+        y = np.asarray(self.y, dtype=np.float64)
+        errores = np.full(self.n, 100.0)
+        y_interpolados = y.copy()
+        
+        if self.n <= grado + 1:
+            return x, errores, y_interpolados
+        
+        vecinos, n_validos = self.indice.matriz_vecinos(x, grado + 1)
+        normales = n_validos == grado + 1
+        y_interp = self._interpolar_lote(x[normales], vecinos[normales])
+        
+        errores[normales], validos = error_porcentual(y[normales], y_interp)
+        y_interpolados[normales] = np.where(validos, y_interp, y[normales])
+        
+        return x, errores, y_interpolados
+    
+    def calcular_errores(self, grados=(1, 2, 3, 4), ejecutor=None):
+        """Calcula calcular_error_grado para varios grados ({grado: resultado}).
+        
+        Con un EjecutorParalelo (módulo ejecutor) los grados se reparten entre
+        procesos; con el backend 'newton' todos los grados que no estén en la
+        caché salen de una sola tabla de diferencias divididas.
+        """
+        if ejecutor is not None:
+            return ejecutor.errores_lagrange(self, grados)
+        if self.backend != 'newton':
+            return {grado: self.calcular_error_grado(grado) for grado in grados}
+        
+        tabla = {}
+        def calcular(grado):
+            if not tabla:
+                tabla.update(self._calcular_errores_newton(grados))
+            return tabla[grado]
+        return {grado: self._memorizar(('lagrange', self.backend, grado), lambda g=grado: calcular(g))
+                for grado in grados}
+    
+    # ----- Backend de diferencias divididas (Newton) -----
+    
+    def _calcular_errores_newton(self, grados):
+        """Errores de varios grados con una tabla de diferencias divididas por punto.
+        
+        Los vecinos de cada punto se ordenan del más cercano al más lejano, así
+        que el polinomio de Newton sobre los primeros grado+1 nodos es el mismo
+        interpolante que usa calcular_error_grado para ese grado: basta una
+        tabla hasta max(grados) y cada grado agrega un término a la evaluación.
+        """
+        x = np.asarray(self.x, dtype=np.float64)
+        y = np.asarray(self.y, dtype=np.float64)
+        grados = sorted(set(grados))
+        resultados = {grado: (x, np.full(self.n, 100.0), y.copy()) for grado in grados}
+        k_max = grados[-1] + 1
+        if self.n <= grados[0] + 1:
+            return resultados
+        
+        with etapa('lagrange.newton'):
+            # Una sola tabla (stencil) por punto para todos los grados
+            contar('lagrange.puntos', self.n * len(grados))
+            contar('lagrange.stencils', self.n)
+            self._tabla_newton(x, y, k_max, resultados)
+        return resultados
+    
+    def _tabla_newton(self, x, y, k_max, resultados):
+        """Llena los errores de cada grado de resultados recorriendo los puntos en bloques"""
+        vecinos, n_validos = self.indice.matriz_vecinos(x, k_max)
+        for inicio in range(0, self.n, self.tam_bloque):
+            bloque = slice(inicio, inicio + self.tam_bloque)
+            X = x[vecinos[bloque]]
+            coeficientes = y[vecinos[bloque]]
+            x_eval = x[bloque]
+            with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+                # Las columnas sin nodo válido solo afectan a términos de grado mayor
+                for j in range(1, k_max):
+                    coeficientes[:, j:] = (coeficientes[:, j:] - coeficientes[:, j - 1:-1]) / (X[:, j:] - X[:, :-j])
+                
+                estimado = coeficientes[:, 0].copy()
+                producto = np.ones(len(x_eval))
+                for j in range(1, k_max):
+                    producto *= x_eval - X[:, j - 1]
+                    estimado += coeficientes[:, j] * producto
+                    grado = j
+                    if grado not in resultados or self.n <= grado + 1:
+                        continue
+                    _, errores, y_interp = resultados[grado]
+                    completos = n_validos[bloque] > grado
+                    filas = np.arange(len(x_eval))[completos] + inicio
+                    errores[filas], validos = error_porcentual(y[filas], estimado[completos])
+                    y_interp[filas] = np.where(validos, estimado[completos], y[filas])
+    
+    def mostrar_resultados(self, resultados=None):
         """Muestra resultados de interpolación"""
+        if resultados is None:
+            resultados = self.calcular_errores()
+        
         print("\n" + "="*70)
         print("INTERPOLACIÓN DE LAGRANGE")
         print("="*70)
         
-        for grado in [1, 2, 3, 4]:
+        for grado, (x_puntos, errores, y_interp) in resultados.items():
             print(f"\n{'─'*70}")
             print(f"GRADO {grado}")
             print(f"{'─'*70}")
             
-            x_puntos, errores, y_interp = self.calcular_error_grado(grado)
-            
             print(f"{'x':<10} {'y_real':<12} {'y_interp':<12} {'error %':<12}")
             print("-" * 50)
             
             for i in range(len(x_puntos)):
                 print(f"{x_puntos[i]:<10.4f} {self.y[i]:<12.4f} {y_interp[i]:<12.4f} {errores[i]:<12.4f}")
     
-    def graficar_errores(self):
+    def graficar_errores(self, resultados=None):
         """Genera gráficas de errores para todos los grados"""
+        if resultados is None:
+            resultados = self.calcular_errores()
+        
+        with etapa('graficas.interpolacion'):
+            return self._graficar_errores(resultados)
+    
+    def _graficar_errores(self, resultados):
+        plt = pyplot()
         fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 10))
         
-        grados = [1, 2, 3, 4]
+        grados = list(resultados)
         colores = ['red', 'blue', 'green', 'purple']
         marcadores = ['o', 's', '^', 'D']
         
         for idx, grado in enumerate(grados):
-            x_puntos, errores, _ = self.calcular_error_grado(grado)
+            x_puntos, errores, _ = resultados[grado]
             
-            x_filtrados = []
-            errores_filtrados = []
-            for i in range(len(errores)):
-                if errores[i] <= 100:
-                    x_filtrados.append(x_puntos[i])
-                    errores_filtrados.append(errores[i])
+            errores = np.asarray(errores)
+            filtro = errores <= 100
+            x_filtrados, errores_filtrados = diezmar(np.asarray(x_puntos)[filtro], errores[filtro])
             
             ax1.plot(x_filtrados, errores_filtrados, 
-                    color=colores[idx], 
-                    marker=marcadores[idx],
+                    color=colores[idx % len(colores)], 
+                    marker=marcadores[idx % len(marcadores)],
                     linewidth=2,
                     markersize=6,
                     label=f'Grado {grado}',
@@ -144,17 +429,19 @@ class InterpolacionLagrange:
         ax1.grid(True, alpha=0.3)
         
         for idx, grado in enumerate(grados):
-            x_puntos, _, y_interp = self.calcular_error_grado(grado)
+            x_puntos, _, y_interp = resultados[grado]
+            x_puntos, y_interp = diezmar(x_puntos, y_interp)
             
             ax2.plot(x_puntos, y_interp,
-                    color=colores[idx],
-                    marker=marcadores[idx],
+                    color=colores[idx % len(colores)],
+                    marker=marcadores[idx % len(marcadores)],
                     linewidth=2,
                     markersize=4,
                     label=f'Interpolación Grado {grado}',
                     alpha=0.7)
         
-        ax2.plot(self.x, self.y, 'ko-', linewidth=2, markersize=8, label='Datos Originales', alpha=0.8)
+        x_datos, y_datos = diezmar(self.x, self.y)
+        ax2.plot(x_datos, y_datos, 'ko-', linewidth=2, markersize=8, label='Datos Originales', alpha=0.8)
         
         ax2.set_xlabel('Coordenada x')
         ax2.set_ylabel('Valor y')
@@ -166,91 +453,341 @@ class InterpolacionLagrange:
         return fig
 
 
+class InterpolacionBaricentrica:
+    """Polinomio de Lagrange en forma baricéntrica.
+    
+    Los pesos w_j = 1 / Π(x_j - x_k) se calculan una vez por conjunto de nodos;
+    evaluar cuesta O(d) por punto y agregar o quitar un nodo actualiza los
+    pesos en O(d).
+    """
+    
+    def __init__(self, x, y, indices=None, tam_bloque=65536):
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        if indices is not None:
+            x = x[list(indices)]
+            y = y[list(indices)]
+        self.x = x.copy()
+        self.y = y.copy()
+        self.tam_bloque = tam_bloque
+        self.pesos = self._calcular_pesos(self.x)
+    
+    @staticmethod
+    def _calcular_pesos(x):
+        """Calcula los pesos baricéntricos de los nodos x"""
+        diferencias = x[:, None] - x[None, :]
+        np.fill_diagonal(diferencias, 1.0)
+        if np.any(np.abs(diferencias) < 1e-12):
+            raise ValueError("Los nodos de interpolación deben tener x distintas")
+        return 1.0 / diferencias.prod(axis=1)
+    
+    @property
+    def grado(self):
+        return len(self.x) - 1
+    
+    def agregar_nodo(self, x_nuevo, y_nuevo):
+        """Agrega un nodo actualizando los pesos en O(d)"""
+        diferencias = self.x - x_nuevo
+        if np.any(np.abs(diferencias) < 1e-12):
+            raise ValueError(f"Ya existe un nodo con x = {x_nuevo}")
+        self.pesos = np.append(self.pesos / diferencias, 1.0 / np.prod(-diferencias))
+        self.x = np.append(self.x, x_nuevo)
+        self.y = np.append(self.y, y_nuevo)
+    
+    def quitar_nodo(self, posicion):
+        """Quita el nodo en la posición dada actualizando los pesos en O(d)"""
+        x_quitado = self.x[posicion]
+        self.x = np.delete(self.x, posicion)
+        self.y = np.delete(self.y, posicion)
+        self.pesos = np.delete(self.pesos, posicion) * (self.x - x_quitado)
+    
+    def evaluar(self, x_eval):
+        """Evalúa el polinomio en un escalar o en un vector de puntos"""
+        escalar = np.ndim(x_eval) == 0
+        x_eval = np.atleast_1d(np.asarray(x_eval, dtype=np.float64))
+        resultado = np.empty(len(x_eval), dtype=np.float64)
+        
+        for inicio in range(0, len(x_eval), self.tam_bloque):
+            bloque = x_eval[inicio:inicio + self.tam_bloque]
+            diferencias = bloque[:, None] - self.x[None, :]
+            exactos = diferencias == 0
+            with np.errstate(divide='ignore', invalid='ignore'):
+                terminos = self.pesos / diferencias
+                valores = (terminos @ self.y) / terminos.sum(axis=1)
+            # Los puntos que coinciden con un nodo toman su y directamente
+            fila, columna = np.nonzero(exactos)
+            valores[fila] = self.y[columna]
+            resultado[inicio:inicio + self.tam_bloque] = valores
+        
+        return resultado[0] if escalar else resultado
+
+
+class AcumuladorMomentos:
+    """Estadísticos suficientes de una regresión polinomial en una sola pasada.
+    
+    Guarda n, Σ(x-x0)^k (k ≤ 2·grado_max), Σ(x-x0)^k·(y-y0) (k ≤ grado_max) y
+    Σ(y-y0)², desplazados respecto a las medias del primer bloque para evitar
+    cancelaciones, y sumados entre bloques con compensación de Kahan. Con eso
+    los ajustes y sus estadísticos se recalculan en O(1) al llegar datos nuevos.
+    """
+    
+    def __init__(self, grado_max=2):
+        self.grado_max = grado_max
+        self.n = 0
+        self.x0 = 0.0
+        self.y0 = 0.0
+        self.sumas_x = np.zeros(2 * grado_max + 1)
+        self.sumas_xy = np.zeros(grado_max + 1)
+        self.suma_y2 = 0.0
+        self._compensacion = np.zeros(3 * grado_max + 3)
+    
+    def _sumar(self, sumas_x, sumas_xy, suma_y2):
+        """Suma compensada (Kahan) de las sumas de un bloque a las acumuladas"""
+        actual = np.concatenate([self.sumas_x, self.sumas_xy, [self.suma_y2]])
+        nuevo = np.concatenate([sumas_x, sumas_xy, [suma_y2]]) - self._compensacion
+        total = actual + nuevo
+        self._compensacion = (total - actual) - nuevo
+        corte = len(self.sumas_x)
+        self.sumas_x = total[:corte]
+        self.sumas_xy = total[corte:-1]
+        self.suma_y2 = total[-1]
+    
+    def actualizar(self, x, y):
+        """Agrega nuevos puntos leyendo cada valor una sola vez"""
+        x = np.atleast_1d(np.asarray(x, dtype=np.float64))
+        y = np.atleast_1d(np.asarray(y, dtype=np.float64))
+        if len(x) == 0:
+            return self
+        if self.n == 0:
+            self.x0 = float(x.mean())
+            self.y0 = float(y.mean())
+        
+        dx = x - self.x0
+        dy = y - self.y0
+        potencias = np.vander(dx, 2 * self.grado_max + 1, increasing=True)
+        self._sumar(potencias.sum(axis=0),
+                    dy @ potencias[:, :self.grado_max + 1],
+                    dy @ dy)
+        self.n += len(x)
+        return self
+    
+    def _recentrar(self, x1, y1):
+        """Expresa las sumas respecto a un nuevo origen (x1, y1)"""
+        h = self.x0 - x1
+        g = self.y0 - y1
+        k_max = len(self.sumas_x)
+        # Σ(x-x1)^k = Σ_j C(k,j)·h^(k-j)·Σ(x-x0)^j
+        binomial = np.array([[math.comb(k, j) * h ** (k - j) if j <= k else 0.0
+                              for j in range(k_max)] for k in range(k_max)])
+        sumas_x = binomial @ self.sumas_x
+        sumas_xy_sin_g = binomial[:self.grado_max + 1, :self.grado_max + 1] @ self.sumas_xy
+        sumas_xy = sumas_xy_sin_g + g * sumas_x[:self.grado_max + 1]
+        suma_y2 = self.suma_y2 + 2 * g * self.sumas_xy[0] + self.n * g ** 2
+        self.sumas_x, self.sumas_xy, self.suma_y2 = sumas_x, sumas_xy, suma_y2
+        self.x0, self.y0 = x1, y1
+        self._compensacion[:] = 0.0
+    
+    def combinar(self, otro):
+        """Incorpora los momentos de otro acumulador (por ejemplo, de otro bloque o proceso)"""
+        if otro.grado_max != self.grado_max:
+            raise ValueError("Los acumuladores deben tener el mismo grado_max")
+        if otro.n == 0:
+            return self
+        if self.n == 0:
+            self.x0, self.y0 = otro.x0, otro.y0
+        otro_recentrado = copy.deepcopy(otro)
+        otro_recentrado._recentrar(self.x0, self.y0)
+        self._sumar(otro_recentrado.sumas_x, otro_recentrado.sumas_xy, otro_recentrado.suma_y2)
+        self.n += otro.n
+        return self
+    
+    def coeficientes(self, grado):
+        """Coeficientes [c0, c1, ..., c_grado] del ajuste por mínimos cuadrados en x"""
+        if grado > self.grado_max:
+            raise ValueError(f"El acumulador solo tiene momentos hasta grado {self.grado_max}")
+        desplazados = self._coeficientes_desplazados(grado)
+        # p(x) = Σ_k c_k (x-x0)^k  ->  potencias de x
+        coeficientes = np.zeros(grado + 1)
+        for k, c_k in enumerate(desplazados):
+            for j in range(k + 1):
+                coeficientes[j] += c_k * math.comb(k, j) * (-self.x0) ** (k - j)
+        coeficientes[0] += self.y0
+        return coeficientes
+    
+    def _coeficientes_desplazados(self, grado):
+        matriz = np.array([[self.sumas_x[i + j] for j in range(grado + 1)] for i in range(grado + 1)])
+        return np.linalg.solve(matriz, self.sumas_xy[:grado + 1])
+    
+    def media_x(self):
+        return self.x0 + self.sumas_x[1] / self.n
+    
+    def media_y(self):
+        return self.y0 + self.sumas_xy[0] / self.n
+    
+    def estadisticas(self, grado):
+        """Estadísticos del ajuste de grado dado calculados solo con los momentos"""
+        c = self._coeficientes_desplazados(grado)
+        matriz = np.array([[self.sumas_x[i + j] for j in range(grado + 1)] for i in range(grado + 1)])
+        sxx = self.sumas_x[2] - self.sumas_x[1] ** 2 / self.n
+        sxy = self.sumas_xy[1] - self.sumas_x[1] * self.sumas_xy[0] / self.n
+        sst = self.suma_y2 - self.sumas_xy[0] ** 2 / self.n
+        sse = max(self.suma_y2 - 2 * c @ self.sumas_xy[:grado + 1] + c @ matriz @ c, 0.0)
+        ssr = sst - sse
+        
+        if sxx == 0 or sst == 0:
+            coef_correlacion = 0
+        else:
+            coef_correlacion = sxy / (sxx * sst) ** 0.5
+        
+        return {
+            'desviacion_estandar_total': (sst / (self.n - 1)) ** 0.5,
+            'error_estandar_estimado': (sse / (self.n - 2)) ** 0.5,
+            'coeficiente_correlacion': coef_correlacion,
+            'coeficiente_determinacion': ssr / sst if sst != 0 else 0
+        }
+
+
 class Regresion:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.n = len(x)
+    def __init__(self, x, y, cache=None):
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        self.n = len(self.x)
+        self.acumulador = AcumuladorMomentos(grado_max=2).actualizar(self.x, self.y)
+        self._qr = None
+        self.cache = cache
+        self._huella = None
+    
+    def actualizar(self, x_nuevos, y_nuevos):
+        """Agrega puntos; los momentos se actualizan sin recorrer el historial"""
+        self.x = np.concatenate([self.x, np.atleast_1d(np.asarray(x_nuevos, dtype=np.float64))])
+        self.y = np.concatenate([self.y, np.atleast_1d(np.asarray(y_nuevos, dtype=np.float64))])
+        self.n = len(self.x)
+        self.acumulador.actualizar(x_nuevos, y_nuevos)
+        self._qr = None
+        self._huella = None
+    
+    def _memorizar(self, partes, calcular):
+        """Usa la caché de resultados (si hay) con clave huella de x, y + partes"""
+        if self.cache is None:
+            return calcular()
+        if self._huella is None:
+            self._huella = self.cache.huella(self.x, self.y)
+        return self.cache.memorizar((self._huella,) + partes, calcular)
     
     def regresion_lineal(self):
         """Calcula regresión lineal y = ax + b"""
-        sum_x = sum(self.x)
-        sum_y = sum(self.y)
-        sum_xy = sum(x_i * y_i for x_i, y_i in zip(self.x, self.y))
-        sum_x2 = sum(x_i ** 2 for x_i in self.x)
-        
-        denominador = self.n * sum_x2 - sum_x ** 2
-        a = (self.n * sum_xy - sum_x * sum_y) / denominador
-        b = (sum_y * sum_x2 - sum_x * sum_xy) / denominador
+        return self._memorizar(('lineal',), self._regresion_lineal)
+    
+    def _regresion_lineal(self):
+        contar('regresion.ajustes')
+        b, a = self.acumulador.coeficientes(1)
         
-        y_pred = [a * x_i + b for x_i in self.x]
+        y_pred = a * self.x + b
         stats = self._calcular_estadisticas(y_pred)
         
         return a, b, y_pred, stats
     
     def regresion_polinomial_grado2(self):
         """Calcula regresión polinomial de segundo grado y = ax² + bx + c"""
-        sum_x = sum(self.x)
-        sum_y = sum(self.y)
-        sum_x2 = sum(x_i ** 2 for x_i in self.x)
-        sum_x3 = sum(x_i ** 3 for x_i in self.x)
-        sum_x4 = sum(x_i ** 4 for x_i in self.x)
-        sum_xy = sum(x_i * y_i for x_i, y_i in zip(self.x, self.y))
-        sum_x2y = sum((x_i ** 2) * y_i for x_i, y_i in zip(self.x, self.y))
-        
-        matriz = [
-            [self.n, sum_x, sum_x2],
-            [sum_x, sum_x2, sum_x3],
-            [sum_x2, sum_x3, sum_x4]
-        ]
-        resultados = [sum_y, sum_xy, sum_x2y]
-        
-        n_sistema = 3
-        for i in range(n_sistema):
-            max_row = max(range(i, n_sistema), key=lambda r: abs(matriz[r][i]))
-            matriz[i], matriz[max_row] = matriz[max_row], matriz[i]
-            resultados[i], resultados[max_row] = resultados[max_row], resultados[i]
-            
-            for j in range(i + 1, n_sistema):
-                factor = matriz[j][i] / matriz[i][i]
-                for k in range(i, n_sistema):
-                    matriz[j][k] -= factor * matriz[i][k]
-                resultados[j] -= factor * resultados[i]
-        
-        solucion = [0] * n_sistema
-        for i in range(n_sistema - 1, -1, -1):
-            solucion[i] = resultados[i]
-            for j in range(i + 1, n_sistema):
-                solucion[i] -= matriz[i][j] * solucion[j]
-            solucion[i] /= matriz[i][i]
-        
-        c, b, a = solucion
-        
-        y_pred = [a * (x_i ** 2) + b * x_i + c for x_i in self.x]
+        return self._memorizar(('polinomial_grado2',), self._regresion_polinomial_grado2)
+    
+    def _regresion_polinomial_grado2(self):
+        contar('regresion.ajustes')
+        c, b, a = self.acumulador.coeficientes(2)
+        
+        y_pred = (a * self.x + b) * self.x + c
         stats = self._calcular_estadisticas(y_pred)
         
         return a, b, c, y_pred, stats
     
+    def _factorizacion_qr(self, grado_max, base):
+        """Factoriza QR la matriz de Vandermonde escalada a [-1, 1] (se reutiliza entre grados)"""
+        if base not in BASES_REGRESION:
+            raise ValueError(f"Base desconocida: {base!r} (opciones: {BASES_REGRESION})")
+        
+        if self._qr is None or self._qr[0] < grado_max or self._qr[1] != base:
+            x_min, x_max = float(self.x.min()), float(self.x.max())
+            if x_max - x_min < 1e-12:
+                x_min, x_max = x_min - 1.0, x_max + 1.0
+            t = (2 * self.x - (x_min + x_max)) / (x_max - x_min)
+            if base == 'chebyshev':
+                vandermonde = np.polynomial.chebyshev.chebvander(t, grado_max)
+            else:
+                vandermonde = np.vander(t, grado_max + 1, increasing=True)
+            Q, R = np.linalg.qr(vandermonde)
+            self._qr = (grado_max, base, (x_min, x_max), Q, R, Q.T @ self.y)
+        
+        return self._qr[2:]
+    
+    def regresion_polinomial_grados(self, grados, base='monomial'):
+        """Ajusta por mínimos cuadrados varios grados con una sola factorización QR.
+        
+        Devuelve {grado: (coeficientes, y_pred, stats)}, con los coeficientes de
+        mayor a menor potencia de x (como a, b, c en regresion_polinomial_grado2).
+        """
+        grados = list(grados)
+        contar('regresion.ajustes', len(grados))
+        dominio, Q, R, qty = self._factorizacion_qr(max(grados), base)
+        tipo = np.polynomial.Chebyshev if base == 'chebyshev' else np.polynomial.Polynomial
+        
+        resultados = {}
+        for grado in grados:
+            k = grado + 1
+            diagonal = np.abs(np.diag(R[:k, :k]))
+            if k > self.n or diagonal.min() < 1e-12 * diagonal.max():
+                raise ValueError(f"Se necesitan al menos {k} valores distintos de x para grado {grado}")
+            
+            coef_base = np.linalg.solve(R[:k, :k], qty[:k])
+            potencias = tipo(coef_base, domain=dominio).convert(kind=np.polynomial.Polynomial).coef
+            coeficientes = np.zeros(k)
+            coeficientes[:len(potencias)] = potencias
+            
+            y_pred = Q[:, :k] @ qty[:k]
+            resultados[grado] = (coeficientes[::-1], y_pred, self._calcular_estadisticas(y_pred))
+        
+        return resultados
+    
+    def regresion_polinomial(self, grado, base='monomial'):
+        """Calcula regresión polinomial de grado arbitrario"""
+        return self._memorizar(('polinomial', grado, base),
+                               lambda: self.regresion_polinomial_grados([grado], base)[grado])
+    
+    def modelo(self, grado, base='monomial'):
+        """Modelo ajustado de un grado (ModeloPolinomial) para predecir en x nuevas"""
+        if grado == 1:
+            a, b, _, stats = self.regresion_lineal()
+            return ModeloPolinomial([a, b], stats)
+        if grado == 2 and base == 'monomial':
+            a, b, c, _, stats = self.regresion_polinomial_grado2()
+            return ModeloPolinomial([a, b, c], stats)
+        coeficientes, _, stats = self.regresion_polinomial(grado, base)
+        return ModeloPolinomial(coeficientes, stats)
+    
     def _calcular_estadisticas(self, y_pred):
         """Calcula estadísticos para evaluar el ajuste"""
-        media_y = sum(self.y) / self.n
-        sst = sum((y_i - media_y) ** 2 for y_i in self.y)
+        contar('regresion.puntos', self.n)
+        acumulador = self.acumulador
+        media_y = acumulador.media_y()
+        desviaciones_y = self.y - media_y
+        sst = desviaciones_y @ desviaciones_y
         desv_estandar_total = (sst / (self.n - 1)) ** 0.5
         
-        sse = sum((y_real - y_pred_i) ** 2 for y_real, y_pred_i in zip(self.y, y_pred))
+        residuos = self.y - y_pred
+        sse = residuos @ residuos
         error_estandar = (sse / (self.n - 2)) ** 0.5
         
-        sum_xy = sum((x_i - sum(self.x)/self.n) * (y_i - sum(self.y)/self.n) 
-                    for x_i, y_i in zip(self.x, self.y))
-        sum_x2 = sum((x_i - sum(self.x)/self.n) ** 2 for x_i in self.x)
-        sum_y2 = sum((y_i - sum(self.y)/self.n) ** 2 for y_i in self.y)
+        # Sumas centradas a partir de los momentos desplazados (sin recorrer los datos)
+        sum_xy = acumulador.sumas_xy[1] - acumulador.sumas_x[1] * acumulador.sumas_xy[0] / self.n
+        sum_x2 = acumulador.sumas_x[2] - acumulador.sumas_x[1] ** 2 / self.n
+        sum_y2 = sst
         
         if sum_x2 == 0 or sum_y2 == 0:
             coef_correlacion = 0
         else:
             coef_correlacion = sum_xy / (sum_x2 * sum_y2) ** 0.5
         
-        ssr = sum((y_pred_i - media_y) ** 2 for y_pred_i in y_pred)
+        desviaciones_pred = y_pred - media_y
+        ssr = desviaciones_pred @ desviaciones_pred
         coef_determinacion = ssr / sst if sst != 0 else 0
         
         return {
@@ -303,17 +840,25 @@ class Regresion:
     
     def graficar_resultados(self, y_lineal, y_polinomial, stats_lineal, stats_polinomial):
         """Genera gráfico con los datos y las regresiones"""
+        with etapa('graficas.regresion'):
+            return self._graficar_resultados(y_lineal, y_polinomial, stats_lineal, stats_polinomial)
+    
+    def _graficar_resultados(self, y_lineal, y_polinomial, stats_lineal, stats_polinomial):
+        plt = pyplot()
         fig = plt.figure(figsize=(12, 8))
         
-        plt.scatter(self.x, self.y, color='black', label='Datos originales', alpha=0.7, s=50)
+        x_datos, y_datos = diezmar(self.x, self.y)
+        plt.scatter(x_datos, y_datos, color='black', label='Datos originales', alpha=0.7, s=50)
         
-        x_ordenado, y_lineal_ordenado = zip(*sorted(zip(self.x, y_lineal)))
-        _, y_polinomial_ordenado = zip(*sorted(zip(self.x, y_polinomial)))
+        # Cada curva se diezma con sus propias x (diezmar ordena por x): las
+        # envolventes de dos curvas distintas no conservan los mismos índices
+        x_lineal, y_lineal_ordenado = diezmar(self.x, y_lineal)
+        x_polinomial, y_polinomial_ordenado = diezmar(self.x, y_polinomial)
         
-        plt.plot(x_ordenado, y_lineal_ordenado, 'r-', linewidth=2, 
+        plt.plot(x_lineal, y_lineal_ordenado, 'r-', linewidth=2, 
                 label=f'Regresión Lineal (R² = {stats_lineal["coeficiente_determinacion"]:.4f})')
         
-        plt.plot(x_ordenado, y_polinomial_ordenado, 'b-', linewidth=2, 
+        plt.plot(x_polinomial, y_polinomial_ordenado, 'b-', linewidth=2, 
                 label=f'Regresión Polinomial Grado 2 (R² = {stats_polinomial["coeficiente_determinacion"]:.4f})')
         
         plt.xlabel('X')
@@ -363,37 +908,42 @@ def buscar_archivo():
     return None
 
 
-def main():
+def main(graficar=True, directorio_graficas=DIRECTORIO_GRAFICAS, formatos=FORMATOS_GRAFICAS, ruta_perfil=None,
+         archivo=None):
+    """Análisis completo; con directorio_graficas las gráficas se guardan sin abrir ventanas.
+    
+    directorio_graficas y formatos toman por defecto INTERPOLACION_GRAFICAS e
+    INTERPOLACION_FORMATOS (p. ej. "png,svg"). Sin archivo se busca datos.xlsx.
+    Al terminar se emite el resumen de tiempos por etapa y contadores (módulo
+    instrumentacion); INTERPOLACION_PERFIL activa cProfile/tracemalloc.
+    """
+    with perfilar(ruta_perfil=ruta_perfil):
+        _analisis_completo(graficar, directorio_graficas, formatos, archivo)
+    metricas.emitir()
+
+
+def _analisis_completo(graficar, directorio_graficas, formatos, archivo=None):
     print("="*70)
     print(" ANÁLISIS COMPLETO: INTERPOLACIÓN Y REGRESIÓN")
     print("="*70)
     
     # Buscar y cargar archivo
-    archivo = buscar_archivo()
+    archivo = archivo or buscar_archivo()
     if not archivo:
         print("\nPor favor, asegúrate de que el archivo 'datos.xlsx' existe")
         return
     
     try:
-        # Leer datos
-        datos = pd.read_excel(archivo)
-        
-        if 'x' not in datos.columns or 'y' not in datos.columns:
+        # Leer datos por bloques (arrays float64 ya sin NaN); las ejecuciones
+        # siguientes sobre el mismo archivo los mapean de la caché binaria
+        try:
+            with etapa('carga'):
+                x_clean, y_clean = cargar_xy(archivo, directorio_cache=DIRECTORIO_CACHE)
+        except ValueError as e:
             print("Error: El archivo debe contener columnas 'x' y 'y'")
-            print(f"Columnas encontradas: {list(datos.columns)}")
+            print(e)
             return
         
-        x = datos['x'].tolist()
-        y = datos['y'].tolist()
-        
-        # Limpiar datos
-        x_clean = []
-        y_clean = []
-        for i in range(len(x)):
-            if not (pd.isna(x[i]) or pd.isna(y[i])):
-                x_clean.append(float(x[i]))
-                y_clean.append(float(y[i]))
-        
         print(f"\nDatos cargados: {len(x_clean)} puntos")
         print("\nPrimeros 5 puntos para ver si se leen correctamente:")
         for i in range(min(5, len(x_clean))):
@@ -404,25 +954,45 @@ def main():
             return
         
         # ===== ANÁLISIS DE REGRESIÓN =====
-        regresion = Regresion(x_clean, y_clean)
-        y_lineal, y_poli, stats_lin, stats_pol = regresion.mostrar_resultados()
+        # Resultados reutilizables entre ejecuciones sobre los mismos datos
+        cache = CacheResultados(directorio=DIRECTORIO_CACHE)
         
-        # ===== INTERPOLACIÓN DE LAGRANGE =====
-        interpolacion = InterpolacionLagrange(x_clean, y_clean)
-        interpolacion.mostrar_resultados()
+        regresion = Regresion(x_clean, y_clean, cache=cache)
+        with etapa('regresion'):
+            y_lineal, y_poli, stats_lin, stats_pol = regresion.mostrar_resultados()
         
-        # ===== GRÁFICAS =====
-        print("\n" + "="*70)
-        print("GENERANDO GRÁFICAS...")
-        print("="*70)
-        
-        # Gráfica de regresión
-        fig_regresion = regresion.graficar_resultados(y_lineal, y_poli, stats_lin, stats_pol)
+        # ===== INTERPOLACIÓN DE LAGRANGE =====
+        interpolacion = InterpolacionLagrange(x_clean, y_clean, cache=cache)
+        with etapa('lagrange'):
+            resultados_interpolacion = interpolacion.calcular_errores()
+        interpolacion.mostrar_resultados(resultados_interpolacion)
         
-        # Gráfica de interpolación
-        fig_interpolacion = interpolacion.graficar_errores()
+        # ===== SELECCIÓN AUTOMÁTICA DE MODELO =====
+        from seleccion import mostrar_seleccion, seleccionar_modelo
+        with etapa('seleccion'):
+            _, tabla_seleccion = seleccionar_modelo(x_clean, y_clean)
+        mostrar_seleccion(tabla_seleccion)
         
-        plt.show()
+        # ===== GRÁFICAS =====
+        if graficar:
+            print("\n" + "="*70)
+            print("GENERANDO GRÁFICAS...")
+            print("="*70)
+        
+        if graficar and directorio_graficas:
+            with etapa('graficas'):
+                archivos = generar_reporte(regresion, interpolacion, directorio_graficas, formatos,
+                                           (y_lineal, y_poli, stats_lin, stats_pol), resultados_interpolacion)
+            for archivo_grafica in archivos:
+                print(f"  {archivo_grafica}")
+        elif graficar:
+            # Gráfica de regresión
+            fig_regresion = regresion.graficar_resultados(y_lineal, y_poli, stats_lin, stats_pol)
+            
+            # Gráfica de interpolación
+            fig_interpolacion = interpolacion.graficar_errores(resultados_interpolacion)
+            
+            pyplot().show()
         
         print("\nAnálisis completado exitosamente")
         
@@ -433,5 +1003,13 @@ def main():
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Análisis completo de interpolación y regresión")
+    parser.add_argument('archivo', nargs='?', help="xlsx/csv/parquet con columnas x, y (por defecto, busca datos.xlsx)")
+    parser.add_argument('--graficas', default=DIRECTORIO_GRAFICAS,
+                        help="carpeta donde guardar las gráficas sin abrir ventanas (INTERPOLACION_GRAFICAS)")
+    parser.add_argument('--formatos', nargs='+', default=list(FORMATOS_GRAFICAS),
+                        help="formatos de las gráficas guardadas (INTERPOLACION_FORMATOS)")
+    parser.add_argument('--sin-graficas', action='store_true', help="no generar gráficas")
+    args = parser.parse_args()
 
-    main()
+    main(not args.sin_graficas, args.graficas, tuple(args.formatos), archivo=args.archivo)
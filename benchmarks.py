@@ -0,0 +1,432 @@
+"""Banco de rendimiento de los caminos críticos (Lagrange, regresión, ICA y carga).
+
+Genera datos sintéticos (x ordenada o desordenada, con duplicados, con NaN)
+de 10² a 10⁷ puntos, mide el mejor tiempo de cada caso, el throughput y la
+memoria pico, estima el exponente de escalamiento y guarda todo en JSON
+para comparar entre ejecuciones:
+
+    python benchmarks.py --salida base.json
+    python benchmarks.py --casos lagrange ica --comparar base.json --salida nuevo.json
+
+Un caso deja de crecer cuando su siguiente tamaño se estima por encima del
+límite de tiempo, así que los caminos O(n²) no bloquean la corrida.
+"""
+
+import argparse
+import gc
+import importlib.util
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+
+VERSION_RESULTADOS = 1
+TAMANOS = tuple(10 ** p for p in range(2, 8))
+VARIANTES_XY = ('ordenado', 'desordenado', 'duplicados')
+
+# preparar(n, variante) -> función sin argumentos a medir (la preparación no se mide)
+Caso = namedtuple('Caso', ['nombre', 'preparar', 'n_max', 'variantes'])
+
+# Rangos (mínimo, máximo) de los parámetros sintéticos del ICA, alrededor de los tramos Qi
+RANGOS_ICA = {
+    'pH': (4, 10), 'Temperatura': (5, 35), 'CO2': (0, 30), 'OD': (0, 12),
+    'Salinidad': (0, 40), 'Alcalinidad F': (0, 50), 'Alcalinidad T': (0, 300),
+    'Nitrito': (0, 1), 'Nitrato': (0, 20), 'Fosfato': (0, 2), 'Turbidez': (0, 100),
+    'Acidez NM': (0, 50), 'Acidez FP': (0, 50), 'SST': (0, 500), 'Conductividad': (0, 2000)
+}
+
+
+# --- Generadores de datos ---
+
+def generar_xy(n, variante='desordenado', fraccion_nan=0.0, semilla=0):
+    """Serie sintética x, y suave con ruido.
+
+    variante: 'ordenado', 'desordenado' o 'duplicados' (x redondeada, con
+    valores repetidos). Con fraccion_nan > 0 esa fracción de y es NaN.
+    """
+    generador = np.random.default_rng(semilla)
+    x = generador.uniform(0.0, 10.0, n)
+    if variante == 'duplicados':
+        x = np.round(x * max(n // 4, 1) / 10.0) * 10.0 / max(n // 4, 1)
+    if variante == 'ordenado':
+        x.sort()
+    y = 2.0 + np.sin(3.0 * x) + 0.1 * x * x + generador.normal(0.0, 0.01, n)
+    if fraccion_nan:
+        y[generador.random(n) < fraccion_nan] = np.nan
+    return x, y
+
+
+def generar_ica(n, columnas, fraccion_nan=0.0, semilla=0):
+    """Columnas sintéticas de muestras de agua {columna: array}"""
+    generador = np.random.default_rng(semilla)
+    datos = {}
+    for columna in columnas:
+        minimo, maximo = RANGOS_ICA.get(columna, (0, 100))
+        valores = generador.uniform(minimo, maximo, n)
+        if fraccion_nan:
+            valores[generador.random(n) < fraccion_nan] = np.nan
+        datos[columna] = valores
+    return datos
+
+
+# --- Casos ---
+
+def _modulo_ica():
+    """Importa el script 'ICA calculo automatico.py' (su nombre no es importable)"""
+    if 'ica_calculo_automatico' not in sys.modules:
+        ruta = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ICA calculo automatico.py')
+        especificacion = importlib.util.spec_from_file_location('ica_calculo_automatico', ruta)
+        modulo = importlib.util.module_from_spec(especificacion)
+        especificacion.loader.exec_module(modulo)
+        sys.modules['ica_calculo_automatico'] = modulo
+    return sys.modules['ica_calculo_automatico']
+
+
+def _lagrange(metodo, backend, grado=3):
+    def preparar(n, variante):
+        from Interpolacion import InterpolacionLagrange
+        x, y = generar_xy(n, variante)
+        if metodo == 'calcular_errores':
+            return lambda: InterpolacionLagrange(x, y, backend).calcular_errores()
+        return lambda: InterpolacionLagrange(x, y, backend).calcular_error_grado(grado)
+    return preparar
+
+
+def _lagrange_vecinos(n, variante, grado=3):
+    from Interpolacion import InterpolacionLagrange
+    interpolacion = InterpolacionLagrange(*generar_xy(n, variante))
+    interpolacion.indice
+    return lambda: [interpolacion.obtener_puntos_para_grado(i, grado) for i in range(n)]
+
+
+def _lagrange_interpolar_punto(n, variante, grado=3):
+    from Interpolacion import InterpolacionLagrange
+    interpolacion = InterpolacionLagrange(*generar_xy(n, variante))
+    vecinos = [interpolacion.obtener_puntos_para_grado(i, grado) for i in range(n)]
+    x = interpolacion.x
+    return lambda: [interpolacion.interpolar_punto(x[i], vecinos[i]) for i in range(n)]
+
+
+def _regresion(metodo, *argumentos):
+    def preparar(n, variante):
+        from Interpolacion import Regresion
+        x, y = generar_xy(n, variante)
+        if metodo == '_calcular_estadisticas':
+            regresion = Regresion(x, y)
+            y_pred = regresion.regresion_lineal()[2]
+            return lambda: regresion._calcular_estadisticas(y_pred)
+        return lambda: getattr(Regresion(x, y), metodo)(*argumentos)
+    return preparar
+
+
+def _spline(metodo, tipo):
+    def preparar(n, variante):
+        from splines import InterpolacionSpline
+        x, y = generar_xy(n, variante)
+        if metodo == 'evaluar':
+            spline = InterpolacionSpline(x, y, tipo)
+            x_eval = generar_xy(n, 'desordenado', semilla=1)[0]
+            return lambda: spline.evaluar(x_eval)
+        return lambda: getattr(InterpolacionSpline(x, y, tipo), metodo)()
+    return preparar
+
+
+def _regresion_online(n, variante):
+    from online import RegresionOnline
+    x, y = generar_xy(n, variante)
+    x, y = x.tolist(), y.tolist()
+
+    def ejecutar():
+        regresion = RegresionOnline()
+        for xi, yi in zip(x, y):
+            regresion.agregar(xi, yi)
+        return regresion.coeficientes(2)
+    return ejecutar
+
+
+def _lagrange_online(n, variante):
+    from online import LagrangeOnline
+    x, y = generar_xy(n, variante)
+    x, y = x.tolist(), y.tolist()
+
+    def ejecutar():
+        interpolacion = LagrangeOnline()
+        for xi, yi in zip(x, y):
+            interpolacion.agregar(xi, yi)
+        return interpolacion
+    return ejecutar
+
+
+def _regresiones_lote(n, variante, series=8):
+    from lotes import regresiones_lote
+    x, _ = generar_xy(n, variante)
+    Y = np.column_stack([generar_xy(n, variante, semilla=s)[1] for s in range(series)])
+    return lambda: regresiones_lote(x, Y)
+
+
+def _ica_muestra(n, variante):
+    modulo = _modulo_ica()
+    datos = generar_ica(n, modulo.columnas_ica, 0.01 if variante == 'nan' else 0.0)
+    filas = [dict(zip(datos, valores)) for valores in zip(*datos.values())]
+    return lambda: [modulo.calcular_ica_muestra(fila) for fila in filas]
+
+
+def _ica_lote(n, variante):
+    from ica_vectorizado import calcular_ica_lote, columnas_ica
+    datos = generar_ica(n, columnas_ica, 0.01 if variante == 'nan' else 0.0)
+    return lambda: calcular_ica_lote(datos)
+
+
+def _incertidumbre(n, variante, sorteos=1000):
+    from ica_vectorizado import columnas_ica
+    from incertidumbre_ica import simular_incertidumbre
+    import pandas  # noqa: F401
+    datos = generar_ica(n, columnas_ica, 0.01 if variante == 'nan' else 0.0)
+    errores = {'ph': 0.1, 'temperatura': 0.5, 'od': 0.2, 'turbidez': '5%', 'conductividad': '2%'}
+    return lambda: simular_incertidumbre(datos, errores, sorteos)
+
+
+def _ventanas(tipo):
+    def preparar(n, variante, estaciones=20):
+        from ica_vectorizado import calcular_ica_lote, columnas_ica
+        from ventanas_ica import IndiceEstaciones, ventanas_fijas, ventanas_moviles
+        # El import perezoso de pandas no debe caer dentro de la medición
+        import pandas  # noqa: F401
+        rng = np.random.default_rng(0)
+        ica, _, qi = calcular_ica_lote(generar_ica(n, columnas_ica, 0.01 if variante == 'nan' else 0.0))
+        # Muestras horarias repartidas en unos diez años
+        tiempos = np.datetime64('2015-01-01T00') + rng.integers(0, 24 * 3650, n).astype('timedelta64[h]')
+        indice = IndiceEstaciones(rng.integers(0, estaciones, n), tiempos)
+        if tipo == 'fijas':
+            return lambda: ventanas_fijas(indice, ica, qi, 'M')
+        return lambda: ventanas_moviles(indice, ica, qi, '30D')
+    return preparar
+
+
+_temporal = None
+
+
+def _cargar_csv(n, variante):
+    from cargadores import cargar_xy
+    global _temporal
+    if _temporal is None:
+        # Se borra solo al terminar el proceso
+        _temporal = tempfile.TemporaryDirectory(prefix='benchmarks_')
+    x, y = generar_xy(n, 'desordenado', 0.05 if variante == 'nan' else 0.0)
+    ruta = os.path.join(_temporal.name, f'datos_{n}_{variante}.csv')
+    np.savetxt(ruta, np.column_stack([x, y]), delimiter=',', header='x,y', comments='', fmt='%.17g')
+    return lambda: cargar_xy(ruta)
+
+
+def _cli(n, subcomando):
+    """Proceso nuevo de cli.py sobre n archivos pequeños: arranque en frío más costo por archivo"""
+    import subprocess
+    global _temporal
+    if _temporal is None:
+        _temporal = tempfile.TemporaryDirectory(prefix='benchmarks_')
+    directorio = os.path.join(_temporal.name, f'cli_{subcomando}_{n}')
+    os.makedirs(directorio, exist_ok=True)
+    for i in range(n):
+        ruta = os.path.join(directorio, f'datos_{i}.csv')
+        if subcomando == 'ica':
+            from ica_vectorizado import columnas_ica
+            datos = generar_ica(50, columnas_ica, semilla=i)
+            np.savetxt(ruta, np.column_stack(list(datos.values())), delimiter=',',
+                       header=','.join(datos), comments='', fmt='%.17g')
+        else:
+            x, y = generar_xy(50, 'desordenado', semilla=i)
+            np.savetxt(ruta, np.column_stack([x, y]), delimiter=',', header='x,y', comments='', fmt='%.17g')
+    comando = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cli.py'),
+               subcomando, os.path.join(directorio, '*.csv')]
+    entorno = {**os.environ, 'INTERPOLACION_CACHE': os.path.join(directorio, 'cache')}
+
+    def ejecutar():
+        return subprocess.run(comando, stdout=subprocess.DEVNULL, env=entorno, check=True)
+    # Una corrida previa llena la caché binaria: se mide el caso de cron (archivos ya vistos)
+    ejecutar()
+    return ejecutar
+
+
+CASOS = [
+    Caso('lagrange.calcular_error_grado[python]', _lagrange('calcular_error_grado', 'python'), 10 ** 5, VARIANTES_XY),
+    Caso('lagrange.calcular_error_grado[numpy]', _lagrange('calcular_error_grado', 'numpy'), 10 ** 7, VARIANTES_XY),
+    Caso('lagrange.calcular_error_grado[newton]', _lagrange('calcular_error_grado', 'newton'), 10 ** 7, VARIANTES_XY),
+    Caso('lagrange.calcular_errores[python]', _lagrange('calcular_errores', 'python'), 10 ** 5, VARIANTES_XY),
+    Caso('lagrange.calcular_errores[numpy]', _lagrange('calcular_errores', 'numpy'), 10 ** 7, VARIANTES_XY),
+    Caso('lagrange.calcular_errores[newton]', _lagrange('calcular_errores', 'newton'), 10 ** 7, VARIANTES_XY),
+    Caso('lagrange.obtener_puntos_para_grado', _lagrange_vecinos, 10 ** 6, VARIANTES_XY),
+    Caso('lagrange.interpolar_punto', _lagrange_interpolar_punto, 10 ** 6, ('desordenado',)),
+    Caso('splines.calcular_error[cubica]', _spline('calcular_error', 'cubica'), 10 ** 6, VARIANTES_XY),
+    Caso('splines.calcular_error[pchip]', _spline('calcular_error', 'pchip'), 10 ** 7, VARIANTES_XY),
+    Caso('splines.evaluar[cubica]', _spline('evaluar', 'cubica'), 10 ** 7, ('desordenado',)),
+    Caso('regresion.regresion_lineal', _regresion('regresion_lineal'), 10 ** 7, VARIANTES_XY),
+    Caso('regresion.regresion_polinomial_grado2', _regresion('regresion_polinomial_grado2'), 10 ** 7, VARIANTES_XY),
+    Caso('regresion.regresion_polinomial[monomial]', _regresion('regresion_polinomial', 4), 10 ** 7, ('desordenado',)),
+    Caso('regresion.regresion_polinomial[chebyshev]',
+         _regresion('regresion_polinomial', 4, 'chebyshev'), 10 ** 7, ('desordenado',)),
+    Caso('regresion._calcular_estadisticas', _regresion('_calcular_estadisticas'), 10 ** 7, ('desordenado',)),
+    Caso('online.RegresionOnline.agregar', _regresion_online, 10 ** 6, ('desordenado',)),
+    Caso('online.LagrangeOnline.agregar', _lagrange_online, 10 ** 5, ('ordenado', 'desordenado')),
+    Caso('lotes.regresiones_lote', _regresiones_lote, 10 ** 6, ('desordenado',)),
+    Caso('ica.calcular_ica_muestra', _ica_muestra, 10 ** 5, ('completo', 'nan')),
+    Caso('ica.calcular_ica_lote', _ica_lote, 10 ** 7, ('completo', 'nan')),
+    Caso('incertidumbre.simular_incertidumbre[1000 sorteos]', _incertidumbre, 10 ** 5, ('completo', 'nan')),
+    Caso('ventanas.ventanas_fijas', _ventanas('fijas'), 10 ** 7, ('completo', 'nan')),
+    Caso('ventanas.ventanas_moviles', _ventanas('moviles'), 10 ** 6, ('completo', 'nan')),
+    Caso('cargadores.cargar_xy[csv]', _cargar_csv, 10 ** 6, ('completo', 'nan')),
+    Caso('cli[archivos]', _cli, 1000, ('ica', 'interpolar', 'regresion')),
+]
+
+
+# --- Medición ---
+
+def medir(funcion, repeticiones=5, tiempo_minimo=0.2):
+    """Mejor tiempo (s) de hasta `repeticiones` llamadas y memoria pico (bytes) de una más"""
+    tiempos = []
+    while len(tiempos) < repeticiones and (not tiempos or sum(tiempos) < tiempo_minimo):
+        gc.collect()
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+
+    # La memoria se mide aparte: tracemalloc hace más lento el código Python
+    gc.collect()
+    tracemalloc.start()
+    try:
+        funcion()
+        pico = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return min(tiempos), len(tiempos), pico
+
+
+def exponente_escalamiento(tamanos, tiempos, tiempo_minimo=1e-3):
+    """Pendiente log-log del tiempo frente a n (1 ≈ lineal, 2 ≈ cuadrático)"""
+    puntos = [(math.log(n), math.log(t)) for n, t in zip(tamanos, tiempos) if t >= tiempo_minimo]
+    if len(puntos) < 2:
+        return None
+    return float(np.polyfit(*zip(*puntos), 1)[0])
+
+
+def ejecutar_caso(caso, variante, tamanos, limite, repeticiones):
+    """Mide el caso en tamaños crecientes hasta n_max o el límite de tiempo"""
+    filas = []
+    for n in tamanos:
+        if n > caso.n_max:
+            break
+        if filas:
+            exponente = exponente_escalamiento([f['n'] for f in filas], [f['segundos'] for f in filas]) or 1.0
+            estimado = filas[-1]['segundos'] * (n / filas[-1]['n']) ** max(exponente, 1.0)
+            if estimado > limite:
+                print(f"  {caso.nombre} [{variante}] n={n}: omitido (estimado {estimado:.1f} s)")
+                break
+
+        funcion = caso.preparar(n, variante)
+        segundos, repetidas, pico = medir(funcion, repeticiones)
+        fila = {
+            'caso': caso.nombre, 'variante': variante, 'n': n,
+            'segundos': segundos, 'repeticiones': repetidas,
+            'puntos_por_segundo': n / segundos if segundos > 0 else None,
+            'memoria_pico_bytes': pico
+        }
+        filas.append(fila)
+        print(f"  {caso.nombre:45} {variante:12} {n:>10} {segundos * 1e3:12.3f} ms "
+              f"{fila['puntos_por_segundo']:12.4g} pts/s {pico / 2 ** 20:9.1f} MiB")
+        del funcion
+    return filas
+
+
+def ejecutar(casos=None, tamanos=TAMANOS, limite=10.0, repeticiones=5):
+    """Corre los casos cuyo nombre empieza por alguno de `casos` (todos si None)"""
+    seleccion = [c for c in CASOS if not casos or any(c.nombre.startswith(p) for p in casos)]
+    resultados = []
+    escalamiento = []
+    for caso in seleccion:
+        for variante in caso.variantes:
+            filas = ejecutar_caso(caso, variante, tamanos, limite, repeticiones)
+            resultados.extend(filas)
+            exponente = exponente_escalamiento([f['n'] for f in filas], [f['segundos'] for f in filas])
+            escalamiento.append({'caso': caso.nombre, 'variante': variante, 'exponente': exponente})
+
+    return {
+        'version': VERSION_RESULTADOS,
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'entorno': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'plataforma': platform.platform(),
+            'procesador': platform.processor() or platform.machine(),
+            'cpus': os.cpu_count()
+        },
+        'resultados': resultados,
+        'escalamiento': escalamiento
+    }
+
+
+def comparar(anterior, actual, umbral=0.2):
+    """Muestra la razón de tiempos actual/anterior; devuelve las filas que empeoraron más del umbral"""
+    previos = {(f['caso'], f['variante'], f['n']): f['segundos'] for f in anterior['resultados']}
+    regresiones = []
+    print("\n=== COMPARACIÓN CON LA EJECUCIÓN ANTERIOR ===")
+    for fila in actual['resultados']:
+        clave = (fila['caso'], fila['variante'], fila['n'])
+        if clave not in previos:
+            continue
+        razon = fila['segundos'] / previos[clave]
+        marca = ''
+        if razon > 1 + umbral:
+            marca = '  <-- más lento'
+            regresiones.append(fila)
+        print(f"  {fila['caso']:45} {fila['variante']:12} {fila['n']:>10} x{razon:6.2f}{marca}")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banco de rendimiento de interpolación, regresión e ICA")
+    parser.add_argument('--casos', nargs='*', help="prefijos de los casos a correr (por defecto, todos)")
+    parser.add_argument('--tamanos', nargs='*', type=int, default=list(TAMANOS), help="tamaños de datos")
+    parser.add_argument('--limite', type=float, default=10.0,
+                        help="segundos máximos estimados por medición antes de dejar de crecer")
+    parser.add_argument('--repeticiones', type=int, default=5, help="repeticiones máximas por medición")
+    parser.add_argument('--salida', help="archivo JSON donde guardar los resultados")
+    parser.add_argument('--comparar', help="JSON de una ejecución anterior")
+    parser.add_argument('--umbral', type=float, default=0.2,
+                        help="empeoramiento relativo que cuenta como regresión")
+    parser.add_argument('--listar', action='store_true', help="muestra los casos disponibles")
+    args = parser.parse_args()
+
+    if args.listar:
+        for caso in CASOS:
+            print(f"{caso.nombre:45} n_max={caso.n_max:<10} {', '.join(caso.variantes)}")
+        return 0
+
+    resultados = ejecutar(args.casos, sorted(args.tamanos), args.limite, args.repeticiones)
+
+    print("\n=== ESCALAMIENTO (tiempo ∝ n^k) ===")
+    for fila in resultados['escalamiento']:
+        k = 'n/d' if fila['exponente'] is None else f"{fila['exponente']:.2f}"
+        print(f"  {fila['caso']:45} {fila['variante']:12} k = {k}")
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as archivo:
+            json.dump(resultados, archivo, indent=1)
+        print(f"\nResultados guardados en {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as archivo:
+            anterior = json.load(archivo)
+        if comparar(anterior, resultados, args.umbral):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
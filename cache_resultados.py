@@ -0,0 +1,167 @@
+"""Caché de resultados (memoria LRU + disco .npz) por huella del contenido de los datos"""
+
+import hashlib
+import os
+import tempfile
+import zipfile
+from collections import OrderedDict
+
+import numpy as np
+
+from instrumentacion import contar
+
+# Cambiar al modificar cómo se calculan los resultados guardados, para invalidar el disco
+VERSION_CACHE = 1
+
+DIRECTORIO_CACHE = os.environ.get(
+    'INTERPOLACION_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'PythonInterpolacion'))
+
+
+def huella(*arrays):
+    """Hash del contenido (valores y forma) de los arrays"""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(VERSION_CACHE).encode())
+    for a in arrays:
+        a = np.ascontiguousarray(a, dtype=np.float64)
+        h.update(str(a.shape).encode())
+        h.update(a.data)
+    return h.hexdigest()
+
+
+def _tamano(valor):
+    """Bytes aproximados de un resultado (tupla de arrays, listas, dicts y escalares)"""
+    if isinstance(valor, np.ndarray):
+        return valor.nbytes
+    if isinstance(valor, (tuple, list)):
+        # Cada elemento por separado: (escalar, array) no es una lista de escalares
+        return sum(_tamano(v) for v in valor)
+    if isinstance(valor, dict):
+        return sum(_tamano(v) for v in valor.values())
+    return 8
+
+
+def _a_npz(valor):
+    """Aplana una tupla de resultados en arrays con nombre para np.savez"""
+    campos = {}
+    for i, elemento in enumerate(valor):
+        if isinstance(elemento, dict):
+            for clave, v in elemento.items():
+                campos[f"{i}__{clave}"] = np.asarray(v)
+        else:
+            campos[f"{i}"] = np.asarray(elemento)
+    return campos
+
+
+def _de_npz(archivo):
+    elementos = {}
+    for nombre in archivo.files:
+        posicion, _, clave = nombre.partition('__')
+        valor = archivo[nombre]
+        if clave:
+            elementos.setdefault(int(posicion), {})[clave] = valor.item()
+        else:
+            elementos[int(posicion)] = valor.item() if valor.ndim == 0 else valor
+    return tuple(elementos[i] for i in sorted(elementos))
+
+
+class CacheResultados:
+    """Caché en dos niveles para resultados de InterpolacionLagrange y Regresion.
+
+    El nivel en memoria es un LRU limitado por bytes; con directorio, cada
+    resultado se guarda además como .npz y se recupera en ejecuciones
+    posteriores sobre los mismos datos. Los resultados devueltos se comparten
+    entre llamadas, así que no deben modificarse.
+    """
+
+    def __init__(self, max_bytes=256 * 2 ** 20, directorio=None):
+        self.max_bytes = max_bytes
+        self.directorio = directorio
+        self.bytes_usados = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self._entradas = OrderedDict()
+        if directorio:
+            try:
+                os.makedirs(directorio, exist_ok=True)
+            except OSError:
+                # Directorio inválido o sin permiso: la caché sigue solo en memoria
+                self.directorio = None
+
+    huella = staticmethod(huella)
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def _ruta(self, clave):
+        nombre = hashlib.blake2b(repr(clave).encode(), digest_size=16).hexdigest()
+        return os.path.join(self.directorio, nombre + '.npz')
+
+    def _guardar_memoria(self, clave, valor):
+        tamano = _tamano(valor)
+        if tamano > self.max_bytes:
+            return
+        if clave in self._entradas:
+            self.bytes_usados -= self._entradas.pop(clave)[1]
+        self._entradas[clave] = (valor, tamano)
+        self.bytes_usados += tamano
+        while self.bytes_usados > self.max_bytes:
+            _, (_, liberado) = self._entradas.popitem(last=False)
+            self.bytes_usados -= liberado
+
+    def obtener(self, clave):
+        """Devuelve el resultado guardado o None"""
+        if clave in self._entradas:
+            self._entradas.move_to_end(clave)
+            return self._entradas[clave][0]
+        if self.directorio:
+            ruta = self._ruta(clave)
+            try:
+                with np.load(ruta, allow_pickle=False) as archivo:
+                    valor = _de_npz(archivo)
+            except FileNotFoundError:
+                return None
+            except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+                # Archivo ilegible: se trata como ausente y se vuelve a calcular
+                contar('cache.errores_disco')
+                return None
+            self._guardar_memoria(clave, valor)
+            return valor
+        return None
+
+    def guardar(self, clave, valor):
+        self._guardar_memoria(clave, valor)
+        if self.directorio:
+            self._guardar_disco(clave, valor)
+
+    def _guardar_disco(self, clave, valor):
+        """Escribe el .npz con un temporal propio (varios procesos pueden guardar la misma clave)"""
+        temporal = None
+        try:
+            descriptor, temporal = tempfile.mkstemp(suffix='.npz', dir=self.directorio)
+            with os.fdopen(descriptor, 'wb') as archivo:
+                np.savez(archivo, **_a_npz(valor))
+            os.replace(temporal, self._ruta(clave))
+        except OSError:
+            # Disco lleno o sin permiso: se sigue solo en memoria, como en cargadores
+            contar('cache.errores_disco')
+            self.directorio = None
+            if temporal and os.path.exists(temporal):
+                os.remove(temporal)
+
+    def memorizar(self, clave, calcular):
+        """Devuelve el resultado de la clave, calculándolo y guardándolo si falta"""
+        valor = self.obtener(clave)
+        if valor is not None:
+            self.aciertos += 1
+            contar('cache.aciertos')
+            return valor
+        self.fallos += 1
+        contar('cache.fallos')
+        valor = calcular()
+        self.guardar(clave, valor)
+        return valor
+
+    def limpiar(self):
+        """Vacía el nivel en memoria (el disco se conserva)"""
+        self._entradas.clear()
+        self.bytes_usados = 0
@@ -0,0 +1,208 @@
+"""Carga por bloques de datos tabulares (xlsx, csv, parquet, arrow) a arrays float64"""
+
+import hashlib
+import json
+import os
+from itertools import islice
+
+import numpy as np
+
+from instrumentacion import contar, etapa, metricas
+
+# Cambiar al modificar cómo se limpian o guardan las columnas, para invalidar la caché binaria
+VERSION_BINARIA = 1
+
+TAM_BLOQUE = 65536
+EXTENSIONES_EXCEL = ('.xlsx', '.xlsm')
+EXTENSIONES_ARROW = ('.arrow', '.feather', '.ipc')
+
+
+def _a_float(valores):
+    """Convierte un bloque de valores a float64; lo no numérico queda como NaN"""
+    try:
+        return np.asarray(valores, dtype=np.float64)
+    except (TypeError, ValueError):
+        import pandas as pd
+        return pd.to_numeric(pd.Series(valores, dtype=object), errors='coerce').to_numpy(np.float64)
+
+
+def _verificar_columnas(encabezado, columnas):
+    """Devuelve la posición de cada columna pedida o lanza ValueError"""
+    encabezado = [str(c) if c is not None else '' for c in encabezado]
+    faltantes = [c for c in columnas if c not in encabezado]
+    if faltantes:
+        raise ValueError(f"Faltan columnas {faltantes}; columnas encontradas: {encabezado}")
+    return [encabezado.index(c) for c in columnas]
+
+
+def _bloques_excel(ruta, columnas, tam_bloque):
+    """Lee la primera hoja de un xlsx en modo solo lectura, fila a fila"""
+    from openpyxl import load_workbook
+
+    libro = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        filas = libro.worksheets[0].iter_rows(values_only=True)
+        posiciones = _verificar_columnas(next(filas, ()), columnas)
+        while True:
+            bloque = list(islice(filas, tam_bloque))
+            if not bloque:
+                break
+            yield {c: _a_float([fila[p] if p < len(fila) else None for fila in bloque])
+                   for c, p in zip(columnas, posiciones)}
+    finally:
+        libro.close()
+
+
+def _bloques_xls(ruta, columnas, tam_bloque):
+    """Formato .xls antiguo: openpyxl no lo lee, se carga con pandas"""
+    import pandas as pd
+
+    datos = pd.read_excel(ruta)
+    _verificar_columnas(datos.columns, columnas)
+    for inicio in range(0, len(datos), tam_bloque):
+        bloque = datos.iloc[inicio:inicio + tam_bloque]
+        yield {c: _a_float(bloque[c].to_numpy()) for c in columnas}
+
+
+def _bloques_csv(ruta, columnas, tam_bloque):
+    import pandas as pd
+
+    _verificar_columnas(pd.read_csv(ruta, nrows=0).columns, columnas)
+    for bloque in pd.read_csv(ruta, usecols=columnas, chunksize=tam_bloque):
+        yield {c: _a_float(bloque[c].to_numpy()) for c in columnas}
+
+
+def _bloques_parquet(ruta, columnas, tam_bloque):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Se necesita pyarrow para leer archivos Parquet") from None
+
+    archivo = pq.ParquetFile(ruta)
+    _verificar_columnas(archivo.schema_arrow.names, columnas)
+    for lote in archivo.iter_batches(batch_size=tam_bloque, columns=columnas):
+        yield {c: _a_float(lote.column(c).to_numpy(zero_copy_only=False)) for c in columnas}
+
+
+def _bloques_arrow(ruta, columnas, tam_bloque):
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ImportError("Se necesita pyarrow para leer archivos Arrow/Feather") from None
+
+    with pa.memory_map(ruta) as fuente:
+        lector = pa.ipc.open_file(fuente)
+        _verificar_columnas(lector.schema.names, columnas)
+        for i in range(lector.num_record_batches):
+            lote = lector.get_batch(i)
+            for inicio in range(0, lote.num_rows, tam_bloque):
+                parte = lote.slice(inicio, tam_bloque)
+                yield {c: _a_float(parte.column(c).to_numpy(zero_copy_only=False)) for c in columnas}
+
+
+def leer_bloques(ruta, columnas, tam_bloque=TAM_BLOQUE, filtrar_nan=True):
+    """Genera bloques {columna: array float64} leyendo el archivo por partes.
+
+    Con filtrar_nan se descartan las filas con NaN en cualquiera de las columnas.
+    """
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension in EXTENSIONES_EXCEL:
+        bloques = _bloques_excel(ruta, columnas, tam_bloque)
+    elif extension == '.xls':
+        bloques = _bloques_xls(ruta, columnas, tam_bloque)
+    elif extension == '.csv':
+        bloques = _bloques_csv(ruta, columnas, tam_bloque)
+    elif extension in ('.parquet', '.pq'):
+        bloques = _bloques_parquet(ruta, columnas, tam_bloque)
+    elif extension in EXTENSIONES_ARROW:
+        bloques = _bloques_arrow(ruta, columnas, tam_bloque)
+    else:
+        raise ValueError(f"Formato no soportado: {extension or ruta}")
+
+    for bloque in metricas.iterar('carga.lectura', bloques):
+        contar('carga.filas', len(bloque[columnas[0]]) if columnas else 0)
+        if filtrar_nan:
+            with etapa('carga.limpieza_nan'):
+                validos = np.logical_and.reduce([~np.isnan(bloque[c]) for c in columnas])
+                if not validos.all():
+                    contar('carga.filas_descartadas', len(validos) - int(validos.sum()))
+                    bloque = {c: v[validos] for c, v in bloque.items()}
+        yield bloque
+
+
+# --- Caché binaria (.npy en memoria mapeada) de columnas ya limpias ---
+
+def _base_binaria(ruta, columnas, filtrar_nan, directorio):
+    """Ruta sin extensión de la caché de esas columnas de ese archivo"""
+    clave = repr((VERSION_BINARIA, os.path.abspath(ruta), list(columnas), filtrar_nan))
+    return os.path.join(directorio, 'columnas_' + hashlib.blake2b(clave.encode(), digest_size=16).hexdigest())
+
+
+def _firma(ruta):
+    """Fecha de modificación (ns) y tamaño del archivo de origen"""
+    estado = os.stat(ruta)
+    return [estado.st_mtime_ns, estado.st_size]
+
+
+def _leer_binario(base, firma):
+    """Columnas mapeadas en memoria (sin copia) o None si falta la caché o el origen cambió"""
+    try:
+        with open(base + '.json', encoding='utf-8') as archivo:
+            descripcion = json.load(archivo)
+        if descripcion['firma'] != firma:
+            return None
+        matriz = np.load(base + '.npy', mmap_mode='r')
+    except (OSError, ValueError, KeyError):
+        return None
+    return {c: matriz[i] for i, c in enumerate(descripcion['columnas'])}
+
+
+def _escribir_binario(base, ruta, firma, datos, columnas):
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+    temporal = base + '.tmp.npy'
+    np.save(temporal, np.stack([datos[c] for c in columnas]))
+    os.replace(temporal, base + '.npy')
+    # La descripción se escribe al final: sin ella la caché no se usa
+    temporal = base + '.tmp.json'
+    with open(temporal, 'w', encoding='utf-8') as archivo:
+        json.dump({'origen': os.path.abspath(ruta), 'firma': firma, 'columnas': list(columnas)}, archivo)
+    os.replace(temporal, base + '.json')
+
+
+def cargar_columnas(ruta, columnas, tam_bloque=TAM_BLOQUE, filtrar_nan=True, directorio_cache=None):
+    """Carga las columnas pedidas como arrays float64 contiguos.
+
+    Con directorio_cache, la primera carga guarda las columnas ya limpias en
+    un .npy y las siguientes lo mapean en memoria sin volver a leer el
+    archivo; la caché se invalida sola si cambian la fecha o el tamaño del
+    origen. Los arrays mapeados son de solo lectura.
+    """
+    if directorio_cache:
+        base = _base_binaria(ruta, columnas, filtrar_nan, directorio_cache)
+        firma = _firma(ruta)
+        with etapa('carga.cache_binaria'):
+            datos = _leer_binario(base, firma)
+        if datos is not None:
+            contar('carga.cache_binaria.aciertos')
+            return datos
+        contar('carga.cache_binaria.fallos')
+        datos = cargar_columnas(ruta, columnas, tam_bloque, filtrar_nan)
+        try:
+            _escribir_binario(base, ruta, firma, datos, columnas)
+        except OSError:
+            # Sin permiso de escritura se sigue sin caché
+            pass
+        return datos
+
+    partes = {c: [] for c in columnas}
+    for bloque in leer_bloques(ruta, columnas, tam_bloque, filtrar_nan):
+        for c in columnas:
+            partes[c].append(bloque[c])
+    return {c: np.concatenate(v) if v else np.empty(0, dtype=np.float64)
+            for c, v in partes.items()}
+
+
+def cargar_xy(ruta, tam_bloque=TAM_BLOQUE, directorio_cache=None):
+    """Carga las columnas 'x' y 'y' sin NaN, listas para Regresion e InterpolacionLagrange"""
+    datos = cargar_columnas(ruta, ['x', 'y'], tam_bloque, directorio_cache=directorio_cache)
+    return datos['x'], datos['y']
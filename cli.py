@@ -0,0 +1,231 @@
+"""Línea de comandos única: ica, interpolar y regresion sobre uno o muchos archivos.
+
+    python cli.py ica 'estaciones/*.xlsx' --formato csv > ica.csv
+    python cli.py ica datos.xlsx --resumen
+    python cli.py interpolar datos.xlsx 'series/**/*.csv' --grados 1 2 3
+    python cli.py interpolar datos.xlsx --metodo pchip --puntos
+    python cli.py regresion 'lotes/*.csv' --grado 3 --base chebyshev
+    python cli.py graficas 'lotes/*.csv' --directorio graficas --formatos png svg
+
+Al arrancar solo se importa la biblioteca estándar: NumPy y los módulos de
+análisis se cargan dentro del subcomando que los usa, así que --help y los
+errores de uso responden al instante. Los archivos se dan como rutas o
+patrones glob (** recorre subcarpetas); cada uno se procesa y se escribe a
+stdout (una línea JSON por registro, o CSV) antes de leer el siguiente. Un
+archivo con error se informa como JSON por stderr, el resto sigue y el
+código de salida es 1. Con la caché binaria de cargadores, las ejecuciones
+repetidas sobre los mismos archivos no vuelven a leer el xlsx/csv.
+"""
+
+import argparse
+import csv
+import glob
+import json
+import math
+import os
+import sys
+
+
+def expandir(patrones):
+    """Rutas de los archivos (en orden, sin repetir); un patrón sin coincidencias se devuelve tal cual"""
+    rutas = []
+    for patron in patrones:
+        coincidencias = sorted(glob.glob(patron, recursive=True)) if glob.has_magic(patron) else [patron]
+        rutas.extend(coincidencias or [patron])
+    return list(dict.fromkeys(rutas))
+
+
+def _valor(valor):
+    """Escalares NumPy a tipos de JSON; NaN e infinitos a null"""
+    if hasattr(valor, 'item'):
+        valor = valor.item()
+    if isinstance(valor, float) and not math.isfinite(valor):
+        return None
+    return valor
+
+
+class Salida:
+    """Escribe registros (dicts) como líneas JSON o CSV; el encabezado CSV sale del primero"""
+
+    def __init__(self, formato='json', flujo=None):
+        self.formato = formato
+        self.flujo = flujo or sys.stdout
+        self._csv = None
+
+    def escribir(self, registros):
+        for registro in registros:
+            registro = {k: _valor(v) for k, v in registro.items()}
+            if self.formato == 'json':
+                self.flujo.write(json.dumps(registro, ensure_ascii=False) + '\n')
+                continue
+            if self._csv is None:
+                self._csv = csv.DictWriter(self.flujo, fieldnames=list(registro), lineterminator='\n')
+                self._csv.writeheader()
+            self._csv.writerow(registro)
+        # Cada archivo queda visible para el siguiente comando del pipeline
+        self.flujo.flush()
+
+
+# --- Subcomandos: cada uno devuelve la lista de registros de un archivo ---
+
+def registros_ica(ruta, args):
+    import numpy as np
+
+    from cache_resultados import DIRECTORIO_CACHE
+    from cargadores import cargar_columnas
+    from ica_vectorizado import cargar_perfil
+
+    registro = cargar_perfil(args.perfil)
+    datos = cargar_columnas(ruta, registro.columnas_ica, filtrar_nan=False, directorio_cache=DIRECTORIO_CACHE)
+    ica, calidad, qi = registro.calcular_ica(datos)
+
+    if args.resumen:
+        validos = ica[~np.isnan(ica)]
+        resumen = {'archivo': ruta, 'muestras': len(ica),
+                   'ica_medio': validos.mean() if len(validos) else None,
+                   'ica_min': validos.min() if len(validos) else None,
+                   'ica_max': validos.max() if len(validos) else None}
+        for nombre in registro.categorias.tolist():
+            resumen[nombre] = int((calidad == nombre).sum())
+        return [resumen]
+
+    claves = registro.claves
+    return [{'archivo': ruta, 'muestra': i + 1, 'ica': valor, 'calidad': categoria, **dict(zip(claves, fila))}
+            for i, (valor, categoria, fila) in enumerate(zip(ica.tolist(), calidad.tolist(), qi.tolist()))]
+
+
+def _cargar_xy(ruta):
+    from cache_resultados import DIRECTORIO_CACHE
+    from cargadores import cargar_xy
+
+    x, y = cargar_xy(ruta, directorio_cache=DIRECTORIO_CACHE)
+    if len(x) < 3:
+        raise ValueError(f"Se necesitan al menos 3 puntos (hay {len(x)})")
+    return x, y
+
+
+def registros_interpolar(ruta, args):
+    x, y = _cargar_xy(ruta)
+    if args.metodo == 'lagrange':
+        from Interpolacion import InterpolacionLagrange
+        resultados = InterpolacionLagrange(x, y, backend=args.backend).calcular_errores(args.grados)
+    else:
+        from splines import InterpolacionSpline
+        resultados = {None: InterpolacionSpline(x, y, args.metodo).calcular_error()}
+
+    registros = []
+    for grado, (x_puntos, errores, y_interp) in resultados.items():
+        base = {'archivo': ruta, 'metodo': args.metodo, 'grado': grado}
+        if args.puntos:
+            registros.extend({**base, 'x': xi, 'y': yi, 'y_interp': yi_interp, 'error': error}
+                             for xi, yi, yi_interp, error in zip(x_puntos.tolist(), y.tolist(),
+                                                                 y_interp.tolist(), errores.tolist()))
+        else:
+            registros.append({**base, 'n': len(errores), 'error_medio': errores.mean(),
+                              'error_maximo': errores.max()})
+    return registros
+
+
+def registros_regresion(ruta, args):
+    from Interpolacion import Regresion
+
+    x, y = _cargar_xy(ruta)
+    modelo = Regresion(x, y).modelo(args.grado, args.base)
+    registro = {'archivo': ruta, 'grado': modelo.grado, 'base': args.base, 'n': len(x)}
+    # Coeficientes de mayor a menor potencia, como ModeloPolinomial
+    registro.update({f'c{modelo.grado - i}': c for i, c in enumerate(modelo.coeficientes.tolist())})
+    registro.update(modelo.estadisticas)
+    return [registro]
+
+
+def registros_graficas(ruta, args):
+    from cache_resultados import DIRECTORIO_CACHE, CacheResultados
+    from Interpolacion import InterpolacionLagrange, Regresion
+    from reportes import generar_reporte
+
+    x, y = _cargar_xy(ruta)
+    cache = CacheResultados(directorio=DIRECTORIO_CACHE)
+    regresion = Regresion(x, y, cache=cache)
+    interpolacion = InterpolacionLagrange(x, y, backend=args.backend, cache=cache)
+    # Los resultados se calculan aquí para no imprimir las tablas de mostrar_resultados en stdout
+    *_, y_lineal, stats_lineal = regresion.regresion_lineal()
+    *_, y_polinomial, stats_polinomial = regresion.regresion_polinomial_grado2()
+    # Una carpeta por archivo para que varios archivos no se pisen las gráficas
+    directorio = os.path.join(args.directorio, os.path.splitext(os.path.basename(ruta))[0])
+    archivos = generar_reporte(regresion, interpolacion, directorio, args.formatos,
+                               (y_lineal, y_polinomial, stats_lineal, stats_polinomial),
+                               interpolacion.calcular_errores())
+    return [{'archivo': ruta, 'grafica': grafica} for grafica in archivos]
+
+
+SUBCOMANDOS = {'ica': registros_ica, 'interpolar': registros_interpolar, 'regresion': registros_regresion,
+               'graficas': registros_graficas}
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(description="ICA, interpolación y regresión sobre archivos xlsx/csv/parquet")
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    comunes = argparse.ArgumentParser(add_help=False)
+    comunes.add_argument('archivos', nargs='+', help="rutas o patrones glob (entre comillas para usar **)")
+    comunes.add_argument('--formato', choices=('json', 'csv'), default='json',
+                         help="una línea JSON por registro o CSV con encabezado")
+    comunes.add_argument('--metricas', action='store_true',
+                         help="emitir tiempos por etapa (a INTERPOLACION_METRICAS o stderr)")
+
+    ica = comandos.add_parser('ica', parents=[comunes], help="ICA, calidad y Qi de cada muestra")
+    ica.add_argument('--perfil', default='predeterminado',
+                     help="perfil de parámetros (nombre en perfiles_ica/ o ruta a un JSON)")
+    ica.add_argument('--resumen', action='store_true', help="un registro por archivo en vez de uno por muestra")
+
+    interpolar = comandos.add_parser('interpolar', parents=[comunes],
+                                     help="errores de dejar-uno-fuera de la interpolación de x, y")
+    interpolar.add_argument('--metodo', choices=('lagrange', 'cubica', 'pchip'), default='lagrange')
+    interpolar.add_argument('--grados', type=int, nargs='+', default=[1, 2, 3, 4], help="grados de Lagrange")
+    interpolar.add_argument('--backend', choices=('python', 'numpy', 'newton'), default='numpy')
+    interpolar.add_argument('--puntos', action='store_true', help="un registro por punto en vez de un resumen")
+
+    regresion = comandos.add_parser('regresion', parents=[comunes], help="coeficientes y estadísticos del ajuste")
+    regresion.add_argument('--grado', type=int, default=2)
+    regresion.add_argument('--base', choices=('monomial', 'chebyshev'), default='monomial')
+
+    graficas = comandos.add_parser('graficas', parents=[comunes],
+                                   help="guarda las gráficas de regresión e interpolación sin abrir ventanas")
+    graficas.add_argument('--directorio', default=os.environ.get('INTERPOLACION_GRAFICAS', 'graficas'),
+                          help="carpeta de salida; una subcarpeta por archivo (INTERPOLACION_GRAFICAS)")
+    graficas.add_argument('--formatos', nargs='+',
+                          default=[f for f in os.environ.get('INTERPOLACION_FORMATOS', 'png').split(',') if f])
+    graficas.add_argument('--backend', choices=('python', 'numpy', 'newton'), default='numpy')
+    return parser
+
+
+def main(argv=None):
+    args = crear_parser().parse_args(argv)
+    from instrumentacion import metricas
+
+    salida = Salida(args.formato)
+    fallidos = 0
+    for ruta in expandir(args.archivos):
+        try:
+            with metricas.etapa(f'cli.{args.comando}'):
+                registros = SUBCOMANDOS[args.comando](ruta, args)
+        except (OSError, ValueError, KeyError, ImportError) as e:
+            fallidos += 1
+            print(json.dumps({'archivo': ruta, 'error': f"{type(e).__name__}: {e}"}, ensure_ascii=False),
+                  file=sys.stderr)
+            continue
+        salida.escribir(registros)
+        metricas.contar('cli.archivos')
+
+    if args.metricas:
+        metricas.emitir()
+    return 1 if fallidos else 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except BrokenPipeError:
+        # El lector cerró la tubería (p. ej. `| head`): terminar sin traza
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
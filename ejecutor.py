@@ -0,0 +1,147 @@
+"""Ejecución en paralelo de análisis independientes (datos, modelo, grado) y por archivo"""
+
+import os
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from cache_resultados import huella
+
+MODELOS = ('lagrange', 'regresion')
+
+# datos: nombre registrado con agregar_datos; opciones: tupla ordenada de pares clave-valor
+Trabajo = namedtuple('Trabajo', ['datos', 'modelo', 'grado', 'opciones'], defaults=((),))
+
+# Memoria compartida abierta en cada proceso de trabajo: (nombre, n) -> (SharedMemory, x, y)
+_memorias = OrderedDict()
+# Segmentos que cada trabajador mantiene abiertos; los más viejos ya suelen estar liberados
+MAX_MEMORIAS = 8
+
+
+def _adjuntar(descriptor):
+    """Vista x, y (sin copia) de los arrays de un conjunto en memoria compartida"""
+    nombre_memoria, n = descriptor
+    if descriptor not in _memorias:
+        memoria = shared_memory.SharedMemory(name=nombre_memoria)
+        datos = np.ndarray((2, n), dtype=np.float64, buffer=memoria.buf)
+        _memorias[descriptor] = (memoria, datos[0], datos[1])
+        while len(_memorias) > MAX_MEMORIAS:
+            _memorias.popitem(last=False)[1][0].close()
+    _memorias.move_to_end(descriptor)
+    return _memorias[descriptor][1:]
+
+
+def _ejecutar_trabajo(descriptor, modelo, grado, opciones):
+    from Interpolacion import InterpolacionLagrange, Regresion
+
+    x, y = _adjuntar(descriptor)
+    opciones = dict(opciones)
+    if modelo == 'lagrange':
+        return InterpolacionLagrange(x, y, **opciones).calcular_error_grado(grado)
+    return Regresion(x, y).regresion_polinomial(grado, **opciones)
+
+
+def _analizar_archivo(ruta, grados, backend):
+    from cargadores import cargar_xy
+    from Interpolacion import InterpolacionLagrange, Regresion
+
+    x, y = cargar_xy(ruta)
+    regresion = Regresion(x, y)
+    interpolacion = InterpolacionLagrange(x, y, backend=backend)
+    return {
+        'ruta': ruta,
+        'n': len(x),
+        'regresion': regresion.regresion_polinomial_grados([g for g in grados if g < len(x)]),
+        'lagrange': interpolacion.calcular_errores(grados)
+    }
+
+
+class EjecutorParalelo:
+    """Reparte trabajos (datos, modelo, grado) entre procesos.
+
+    Los arrays de entrada se copian una vez a memoria compartida y los
+    trabajadores los leen sin copiarlos; los trabajos repetidos se ejecutan
+    una sola vez y los resultados se devuelven en el orden pedido.
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or os.cpu_count()
+        self._pool = None
+        self._datos = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    def agregar_datos(self, nombre, x, y):
+        """Copia x, y a memoria compartida con el nombre dado (reemplaza otros datos con ese nombre)"""
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        clave = huella(x, y)
+        if nombre in self._datos:
+            if self._datos[nombre][2] == clave:
+                return
+            self.quitar_datos(nombre)
+        memoria = shared_memory.SharedMemory(create=True, size=max(2 * x.nbytes, 1))
+        datos = np.ndarray((2, len(x)), dtype=np.float64, buffer=memoria.buf)
+        datos[0] = x
+        datos[1] = y
+        self._datos[nombre] = (memoria, len(x), clave)
+
+    def quitar_datos(self, nombre):
+        """Libera la memoria compartida de un conjunto registrado"""
+        memoria, _, _ = self._datos.pop(nombre)
+        memoria.close()
+        memoria.unlink()
+
+    def ejecutar(self, trabajos):
+        """Ejecuta la lista de Trabajo y devuelve sus resultados en el mismo orden"""
+        trabajos = [Trabajo(*t) for t in trabajos]
+        for t in trabajos:
+            if t.datos not in self._datos:
+                raise KeyError(f"Datos no registrados: {t.datos!r}")
+            if t.modelo not in MODELOS:
+                raise ValueError(f"Modelo desconocido: {t.modelo!r} (opciones: {MODELOS})")
+
+        futuros = {}
+        for t in dict.fromkeys(trabajos):
+            memoria, n, _ = self._datos[t.datos]
+            futuros[t] = self.pool.submit(_ejecutar_trabajo, (memoria.name, n), t.modelo, t.grado, t.opciones)
+        return [futuros[t].result() for t in trabajos]
+
+    def errores_lagrange(self, interpolacion, grados):
+        """calcular_errores de una InterpolacionLagrange repartido por grado"""
+        # Por contenido y no por id(): un id se reutiliza tras liberar el objeto
+        nombre = f"lagrange-{huella(interpolacion.x, interpolacion.y)}"
+        self.agregar_datos(nombre, interpolacion.x, interpolacion.y)
+        opciones = (('backend', interpolacion.backend),)
+        try:
+            resultados = self.ejecutar([Trabajo(nombre, 'lagrange', grado, opciones) for grado in grados])
+        finally:
+            self.quitar_datos(nombre)
+        return dict(zip(grados, resultados))
+
+    def analizar_archivos(self, rutas, grados=(1, 2, 3, 4), backend='numpy'):
+        """Carga y analiza cada archivo en un proceso; devuelve un resultado por ruta, en orden"""
+        rutas = list(rutas)
+        futuros = {ruta: self.pool.submit(_analizar_archivo, ruta, tuple(grados), backend)
+                   for ruta in dict.fromkeys(rutas)}
+        return [futuros[ruta].result() for ruta in rutas]
+
+    def cerrar(self):
+        """Detiene los procesos y libera la memoria compartida"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        for nombre in list(self._datos):
+            self.quitar_datos(nombre)
@@ -0,0 +1,272 @@
+"""Pipeline de ICA por flujo: fuente -> Qi vectorizado -> agregación -> sumidero.
+
+Cada etapa es un generador que pide el siguiente bloque a la anterior solo
+cuando lo necesita, así que el sumidero marca el ritmo (contrapresión) y en
+memoria nunca hay más de un bloque por etapa, sin importar el largo de la
+entrada. Uso típico como proceso de larga duración:
+
+    python ica_streaming.py sensores.csv --seguir --salida ica.csv
+    tail -f sensores.jsonl | python ica_streaming.py - --salida ica.parquet
+"""
+
+import argparse
+import csv
+import json
+import os
+import select
+import sys
+import time
+
+import numpy as np
+
+from cargadores import TAM_BLOQUE, _verificar_columnas, leer_bloques
+from ica_vectorizado import cargar_perfil, registro_predeterminado
+from instrumentacion import metricas, perfilar
+
+
+def _a_float(valor):
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _bloque_de_filas(filas, columnas):
+    """Convierte una lista de dicts {columna: valor} en un bloque de arrays (faltantes = NaN)"""
+    return {c: np.array([_a_float(f.get(c)) for f in filas]) for c in columnas}
+
+
+# --- Fuentes ---
+
+def fuente_archivo(ruta, tam_bloque=TAM_BLOQUE, registro=registro_predeterminado):
+    """Bloques de un xlsx/csv/parquet leído por partes"""
+    yield from leer_bloques(ruta, registro.columnas_ica, tam_bloque, filtrar_nan=False)
+
+
+def _lineas_con_espera(flujo, max_espera):
+    """Líneas del flujo; produce None si pasan max_espera segundos sin datos"""
+    try:
+        descriptor = flujo.fileno()
+    except (AttributeError, OSError):
+        descriptor = None
+    if descriptor is None or max_espera is None:
+        yield from iter(flujo.readline, '')
+        return
+    # select() mira el descriptor, no el búfer de TextIOWrapper: si se leyera
+    # con readline, las líneas ya guardadas en el búfer quedarían sin entregar
+    # hasta que llegaran más datos. Se lee el descriptor y se corta a mano.
+    codificacion = getattr(flujo, 'encoding', None) or 'utf-8'
+    pendiente = b''
+    while True:
+        listo, _, _ = select.select([descriptor], [], [], max_espera)
+        if not listo:
+            yield None
+            continue
+        datos = os.read(descriptor, 1 << 16)
+        if not datos:
+            break
+        *lineas, pendiente = (pendiente + datos).split(b'\n')
+        for linea in lineas:
+            yield linea.decode(codificacion) + '\n'
+    if pendiente:
+        yield pendiente.decode(codificacion)
+
+
+def fuente_jsonl(flujo=None, tam_bloque=1024, max_espera=1.0, registro=registro_predeterminado):
+    """Bloques de líneas JSON (una muestra por línea) leídas de stdin u otro flujo.
+
+    Un bloque se entrega al llenarse o cuando el flujo queda max_espera
+    segundos sin datos, para no retener muestras en feeds lentos. Las líneas
+    que no son un objeto JSON se descartan (se avisa por stderr y se cuentan
+    en ica.lineas_descartadas) sin cortar el flujo.
+    """
+    flujo = flujo or sys.stdin
+    filas = []
+    for numero, linea in enumerate(_lineas_con_espera(flujo, max_espera), 1):
+        if linea is not None and linea.strip():
+            try:
+                fila = json.loads(linea)
+            except ValueError as e:
+                fila = e
+            if isinstance(fila, dict):
+                filas.append(fila)
+            else:
+                metricas.contar('ica.lineas_descartadas')
+                motivo = fila if isinstance(fila, ValueError) else "no es un objeto JSON"
+                print(f"Línea {numero} descartada: {motivo}", file=sys.stderr)
+        if filas and (linea is None or len(filas) >= tam_bloque):
+            yield _bloque_de_filas(filas, registro.columnas_ica)
+            filas = []
+    if filas:
+        yield _bloque_de_filas(filas, registro.columnas_ica)
+
+
+def fuente_csv_seguir(ruta, tam_bloque=1024, intervalo=1.0, registro=registro_predeterminado):
+    """Sigue un CSV que crece (como tail -f) y entrega bloques de filas nuevas"""
+    with open(ruta, newline='') as archivo:
+        encabezado = next(csv.reader([archivo.readline()]), [])
+        # Como leer_bloques: una columna mal nombrada daría ICA NaN para siempre
+        _verificar_columnas(encabezado, registro.columnas_ica)
+        filas = []
+        pendiente = ''
+        while True:
+            linea = archivo.readline()
+            if linea.endswith('\n'):
+                filas.append(dict(zip(encabezado, next(csv.reader([pendiente + linea])))))
+                pendiente = ''
+                if len(filas) < tam_bloque:
+                    continue
+            else:
+                # Línea incompleta (el escritor aún no terminó): se completa en la siguiente lectura
+                pendiente += linea
+            if filas:
+                yield _bloque_de_filas(filas, registro.columnas_ica)
+                filas = []
+            else:
+                time.sleep(intervalo)
+
+
+# --- Etapas ---
+
+def puntuar(bloques, registro=registro_predeterminado):
+    """Agrega a cada bloque el ICA, la calidad y la matriz Qi de sus muestras"""
+    inicio = 0
+    for bloque in bloques:
+        ica, calidad, qi = registro.calcular_ica(bloque)
+        yield {
+            'muestra': np.arange(inicio + 1, inicio + len(ica) + 1),
+            'ica': ica,
+            'calidad': calidad,
+            'qi': qi
+        }
+        inicio += len(ica)
+
+
+class ResumenICA:
+    """Estadísticos acumulados del ICA con memoria constante"""
+
+    def __init__(self, registro=registro_predeterminado):
+        self.n = 0
+        self.suma = 0.0
+        self.minimo = np.inf
+        self.maximo = -np.inf
+        self.conteo = dict.fromkeys(registro.categorias.tolist(), 0)
+
+    def actualizar(self, ica, calidad):
+        validos = ~np.isnan(ica)
+        if validos.any():
+            self.suma += ica[validos].sum()
+            self.minimo = min(self.minimo, ica[validos].min())
+            self.maximo = max(self.maximo, ica[validos].max())
+        self.n += int(validos.sum())
+        nombres, cantidades = np.unique(calidad, return_counts=True)
+        for nombre, cantidad in zip(nombres, cantidades):
+            self.conteo[nombre] += int(cantidad)
+
+    def mostrar(self):
+        print("\n=== RESUMEN DEL ICA ===")
+        print(f"Muestras: {sum(self.conteo.values())}")
+        if self.n:
+            print(f"ICA medio: {self.suma / self.n:.2f}  (mín {self.minimo:.2f}, máx {self.maximo:.2f})")
+        for nombre, cantidad in self.conteo.items():
+            print(f"{nombre:15}: {cantidad}")
+
+
+def agregar(resultados, resumen):
+    """Actualiza el resumen con cada bloque y lo deja pasar"""
+    for bloque in resultados:
+        resumen.actualizar(bloque['ica'], bloque['calidad'])
+        yield bloque
+
+
+# --- Sumideros ---
+
+def _tabla(bloque, registro):
+    tabla = {'Muestra': bloque['muestra'], 'ICA': bloque['ica'], 'Calidad': bloque['calidad']}
+    for j, parametro in enumerate(registro.claves):
+        tabla[parametro] = bloque['qi'][:, j]
+    return tabla
+
+
+def sumidero_csv(resultados, ruta, registro=registro_predeterminado):
+    """Escribe cada bloque al CSV a medida que llega"""
+    with open(ruta, 'w', newline='') as archivo:
+        escritor = csv.writer(archivo)
+        escritor.writerow(['Muestra', 'ICA', 'Calidad', *registro.claves])
+        for bloque in resultados:
+            escritor.writerows(zip(*_tabla(bloque, registro).values()))
+            archivo.flush()
+
+
+def sumidero_parquet(resultados, ruta, registro=registro_predeterminado):
+    """Escribe cada bloque como un grupo de filas de un archivo Parquet"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Se necesita pyarrow para escribir archivos Parquet") from None
+
+    escritor = None
+    try:
+        for bloque in resultados:
+            tabla = pa.table(_tabla(bloque, registro))
+            if escritor is None:
+                escritor = pq.ParquetWriter(ruta, tabla.schema)
+            escritor.write_table(tabla)
+    finally:
+        if escritor is not None:
+            escritor.close()
+
+
+def sumidero_consola(resultados):
+    """Muestra una línea por muestra (sin guardar nada)"""
+    for bloque in resultados:
+        for muestra, ica, calidad in zip(bloque['muestra'], bloque['ica'], bloque['calidad']):
+            print(f"{muestra:^10} {ica:^10.2f} {calidad:^15}")
+
+
+def ejecutar_pipeline(fuente, salida=None, resumen=None, registro=registro_predeterminado):
+    """Conecta fuente -> puntuar -> agregar -> sumidero y devuelve el resumen"""
+    resumen = resumen or ResumenICA(registro)
+    resultados = agregar(puntuar(metricas.iterar('ica.fuente', fuente), registro), resumen)
+    if salida is None:
+        sumidero_consola(resultados)
+    elif os.path.splitext(salida)[1].lower() in ('.parquet', '.pq'):
+        sumidero_parquet(resultados, salida, registro)
+    else:
+        sumidero_csv(resultados, salida, registro)
+    return resumen
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cálculo de ICA por flujo con memoria constante")
+    parser.add_argument('entrada', help="archivo xlsx/csv/parquet, o '-' para líneas JSON por stdin")
+    parser.add_argument('--salida', help="archivo .csv o .parquet (por defecto, consola)")
+    parser.add_argument('--seguir', action='store_true', help="seguir un CSV que crece (tail -f)")
+    parser.add_argument('--tam-bloque', type=int, default=None, help="muestras por bloque")
+    parser.add_argument('--max-espera', type=float, default=1.0,
+                        help="segundos sin datos antes de procesar un bloque incompleto")
+    parser.add_argument('--perfil', default='predeterminado',
+                        help="perfil de parámetros (nombre en perfiles_ica/ o ruta a un JSON)")
+    args = parser.parse_args()
+    registro = cargar_perfil(args.perfil)
+
+    if args.entrada == '-':
+        fuente = fuente_jsonl(sys.stdin, args.tam_bloque or 1024, args.max_espera, registro)
+    elif args.seguir:
+        fuente = fuente_csv_seguir(args.entrada, args.tam_bloque or 1024, args.max_espera, registro)
+    else:
+        fuente = fuente_archivo(args.entrada, args.tam_bloque or TAM_BLOQUE, registro)
+
+    resumen = ResumenICA(registro)
+    with perfilar():
+        try:
+            ejecutar_pipeline(fuente, args.salida, resumen, registro)
+        except KeyboardInterrupt:
+            pass
+    resumen.mostrar()
+    metricas.emitir()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""Cálculo vectorizado del ICA con perfiles de parámetros cargados de archivos de configuración.
+
+Un perfil (JSON en perfiles_ica/) define, para cada parámetro, la columna del
+archivo, su peso y su curva Qi por tramos. Cada tramo
+[inferior, superior, valor, pendiente, origen] da
+Qi = valor + pendiente·(x - origen) si inferior ≤ x ≤ superior (null = sin
+límite); como en las funciones qi_*, gana el primer tramo que cumple y el
+último, sin límites, es el "else". "minimo" (opcional) es el menor valor
+físicamente posible del parámetro (0 en concentraciones y turbidez; sin él,
+p. ej. en temperatura, no hay cota).
+"""
+
+import json
+import os
+import warnings
+
+import numpy as np
+
+from instrumentacion import contar, etapa
+
+DIRECTORIO_PERFILES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'perfiles_ica')
+TOLERANCIA_PESOS = 1e-9
+# Los pesos de ICA calculo automatico.py suman 0.95, no 1, y el perfil
+# predeterminado los reproduce tal cual; la suma esperada vive aquí y no en el
+# JSON para que un peso mal editado no pueda "validarse" a sí mismo
+SUMA_PESOS_PREDETERMINADO = 0.95
+RUTA_PREDETERMINADO = os.path.join(DIRECTORIO_PERFILES, 'predeterminado.json')
+
+
+def _limite(valor, por_defecto):
+    return por_defecto if valor is None else float(valor)
+
+
+class RegistroICA:
+    """Parámetros de un perfil de ICA, validados una vez y compilados a arrays.
+
+    Los tramos de todos los parámetros quedan en arrays contiguos
+    (inferiores, superiores, valores, pendientes, orígenes) indexados por
+    desplazamientos, de modo que cada curva se evalúa sobre una columna
+    completa sin recorrer cadenas if/elif.
+    """
+
+    def __init__(self, parametros, limites_calidad, categorias, suma_pesos=None, nombre=''):
+        self.nombre = nombre
+        self.claves = [p['clave'] for p in parametros]
+        self.columnas = {p['clave']: p['columna'] for p in parametros}
+        self.pesos = {p['clave']: float(p['peso']) for p in parametros}
+        self.minimos = {p['clave']: _limite(p.get('minimo'), -np.inf) for p in parametros}
+        self.tramos = {p['clave']: [(_limite(t[0], -np.inf), _limite(t[1], np.inf), *t[2:])
+                                    for t in p['tramos']] for p in parametros}
+        self.limites_calidad = [float(v) for v in limites_calidad]
+        self.categorias = np.array(categorias)
+        self.suma_pesos = suma_pesos
+        self._validar()
+        self._compilar()
+
+    @classmethod
+    def desde_archivo(cls, ruta, suma_pesos=None):
+        with open(ruta, encoding='utf-8') as archivo:
+            perfil = json.load(archivo)
+        return cls(perfil['parametros'], perfil['limites_calidad'], perfil['categorias'],
+                   suma_pesos, perfil.get('nombre', os.path.basename(ruta)))
+
+    @property
+    def columnas_ica(self):
+        return [self.columnas[c] for c in self.claves]
+
+    def _validar(self):
+        """Comprueba pesos, tramos y categorías; lanza ValueError con todos los problemas.
+
+        Con suma_pesos los pesos deben sumar exactamente eso; sin ella, una
+        suma distinta de 1 solo se advierte (el ICA no llegaría a 100).
+        """
+        errores = []
+        if len(set(self.claves)) != len(self.claves):
+            errores.append("hay claves de parámetro repetidas")
+        if len(set(self.columnas.values())) != len(self.columnas):
+            errores.append("hay columnas repetidas")
+        if any(p < 0 for p in self.pesos.values()):
+            errores.append("hay pesos negativos")
+        suma = sum(self.pesos.values())
+        if self.suma_pesos is not None and abs(suma - self.suma_pesos) > TOLERANCIA_PESOS:
+            errores.append(f"los pesos suman {suma:.6g} y se esperaba {self.suma_pesos}")
+        elif self.suma_pesos is None and abs(suma - 1.0) > TOLERANCIA_PESOS:
+            warnings.warn(f"Perfil de ICA {self.nombre!r}: los pesos suman {suma:.6g}, no 1", stacklevel=3)
+
+        for clave, tramos in self.tramos.items():
+            if not tramos or tramos[-1][:2] != (-np.inf, np.inf):
+                errores.append(f"{clave}: el último tramo debe ir sin límites (caso por defecto)")
+            if any(len(t) != 5 or t[0] > t[1] for t in tramos):
+                errores.append(f"{clave}: cada tramo debe ser [inferior ≤ superior, valor, pendiente, origen]")
+                continue
+            # En cadenas "x <= a" los límites deben crecer y en "x >= a" decrecer;
+            # si no, hay tramos que nunca se alcanzan
+            superiores = [t[1] for t in tramos[:-1] if t[0] == -np.inf]
+            inferiores = [t[0] for t in tramos[:-1] if t[1] == np.inf]
+            if any(b <= a for a, b in zip(superiores, superiores[1:])):
+                errores.append(f"{clave}: los límites superiores no son crecientes")
+            if any(b >= a for a, b in zip(inferiores, inferiores[1:])):
+                errores.append(f"{clave}: los límites inferiores no son decrecientes")
+
+        if any(b <= a for a, b in zip(self.limites_calidad, self.limites_calidad[1:])):
+            errores.append("limites_calidad debe ser estrictamente creciente")
+        if len(self.categorias) != len(self.limites_calidad) + 1:
+            errores.append("debe haber una categoría más que límites de calidad")
+
+        if errores:
+            raise ValueError(f"Perfil de ICA inválido {self.nombre!r}: " + "; ".join(errores))
+
+    def _compilar(self):
+        todos = [t for clave in self.claves for t in self.tramos[clave]]
+        self.inferiores, self.superiores, self.valores, self.pendientes, self.origenes = (
+            np.ascontiguousarray(columna, dtype=np.float64) for columna in zip(*todos))
+        self.desplazamientos = np.cumsum([0] + [len(self.tramos[c]) for c in self.claves])
+        self.pesos_array = np.array([self.pesos[c] for c in self.claves])
+        self.minimos_array = np.array([self.minimos[c] for c in self.claves])
+
+    def evaluar_parametro(self, j, x):
+        """Qi del parámetro j-ésimo para un array de valores"""
+        x = np.asarray(x, dtype=np.float64)
+        tramo = slice(self.desplazamientos[j], self.desplazamientos[j + 1])
+        cumple = (self.inferiores[tramo] <= x[:, None]) & (x[:, None] <= self.superiores[tramo])
+        # Primer tramo que cumple; un NaN no cumple ninguno y cae en el último
+        elegido = np.where(cumple.any(axis=1), cumple.argmax(axis=1), cumple.shape[1] - 1)
+        elegido += self.desplazamientos[j]
+        pendiente = self.pendientes[elegido]
+        # Los tramos constantes no dependen de x (un NaN también recibe el valor)
+        return np.where(pendiente == 0, self.valores[elegido],
+                        self.valores[elegido] + pendiente * (x - self.origenes[elegido]))
+
+    def calcular_qi(self, datos):
+        """Matriz Qi (n muestras, parámetros en orden); KeyError si falta una columna"""
+        return np.column_stack([self.evaluar_parametro(j, datos[self.columnas[c]])
+                                for j, c in enumerate(self.claves)])
+
+    def indices_calidad(self, ica):
+        """Posición en categorias de cada valor de ICA"""
+        ica = np.asarray(ica, dtype=np.float64)
+        posicion = np.digitize(ica, self.limites_calidad, right=True)
+        # Un ICA NaN no supera ningún límite, igual que en calcular_ica_muestra
+        posicion[np.isnan(ica)] = 0
+        return posicion
+
+    def clasificar(self, ica):
+        """Categoría de calidad de cada valor de ICA"""
+        return self.categorias[self.indices_calidad(ica)]
+
+    def calcular_ica(self, datos):
+        """ICA, categoría y matriz Qi de todas las muestras a la vez"""
+        with etapa('ica.calculo'):
+            qi = self.calcular_qi(datos)
+            contar('ica.muestras', len(qi))
+            # Suma ponderada parámetro a parámetro, en el mismo orden que
+            # calcular_ica_muestra, para obtener exactamente los mismos valores
+            ica = np.zeros(len(qi))
+            for j, peso in enumerate(self.pesos_array):
+                ica += qi[:, j] * peso
+            return ica, self.clasificar(ica), qi
+
+
+_registros = {}
+
+
+def cargar_perfil(perfil='predeterminado'):
+    """Registro de un perfil por nombre (en perfiles_ica/) o ruta a un JSON; se compila una vez"""
+    ruta = perfil if os.path.exists(perfil) else os.path.join(DIRECTORIO_PERFILES, perfil + '.json')
+    ruta = os.path.abspath(ruta)
+    if ruta not in _registros:
+        suma_pesos = SUMA_PESOS_PREDETERMINADO if ruta == os.path.abspath(RUTA_PREDETERMINADO) else None
+        _registros[ruta] = RegistroICA.desde_archivo(ruta, suma_pesos)
+    return _registros[ruta]
+
+
+registro_predeterminado = cargar_perfil()
+
+# --- Nombres del perfil predeterminado (usados por los scripts) ---
+pesos = registro_predeterminado.pesos
+columnas = registro_predeterminado.columnas
+columnas_ica = registro_predeterminado.columnas_ica
+tramos_qi = registro_predeterminado.tramos
+limites_calidad = registro_predeterminado.limites_calidad
+categorias = registro_predeterminado.categorias
+
+
+def calcular_qi_lote(datos, registro=None):
+    """Matriz Qi (n muestras, parámetros en el orden de pesos)"""
+    return (registro or registro_predeterminado).calcular_qi(datos)
+
+
+def clasificar(ica, registro=None):
+    """Categoría de calidad de cada valor de ICA"""
+    return (registro or registro_predeterminado).clasificar(ica)
+
+
+def calcular_ica_lote(datos, registro=None):
+    """ICA, categoría y matriz Qi de todas las muestras a la vez"""
+    return (registro or registro_predeterminado).calcular_ica(datos)
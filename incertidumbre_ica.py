@@ -0,0 +1,210 @@
+"""Incertidumbre del ICA por Monte Carlo: intervalos, probabilidad de cambio de categoría y sensibilidad.
+
+Cada medición se perturba según el error de su instrumento y se vuelve a
+puntuar con las curvas compiladas de RegistroICA, todos los sorteos de un
+bloque de muestras a la vez. Los errores se dan por parámetro (clave del
+perfil o nombre de columna):
+
+    {"ph": 0.1, "turbidez": "5%", "od": {"sigma": 0.2, "distribucion": "uniforme"}}
+
+un número es una desviación absoluta, "N%" una relativa al valor medido y
+con distribución uniforme sigma es la semiamplitud (p. ej. la resolución del
+instrumento). Los parámetros sin error quedan fijos. Los valores sorteados
+no bajan del "minimo" del perfil (0 en concentraciones y turbidez); los
+parámetros sin mínimo, como la temperatura, no se recortan.
+
+Como el ICA es una suma ponderada de Qi de parámetros perturbados de forma
+independiente, su varianza es exactamente Σ peso² · Var(Qi); la fracción de
+cada término mide qué parámetro domina la incertidumbre, con los mismos
+sorteos y sin corridas extra.
+"""
+
+import argparse
+import json
+
+import numpy as np
+
+from cache_resultados import DIRECTORIO_CACHE
+from cargadores import cargar_columnas
+from ica_vectorizado import cargar_perfil, registro_predeterminado
+from instrumentacion import contar, etapa
+
+SORTEOS = 1000
+NIVEL = 0.95
+# Elementos por matriz (muestras × sorteos) de un parámetro; acota la memoria
+TAM_BLOQUE = 2 ** 20
+
+
+def _especificaciones(errores, registro):
+    """Arrays (absoluta, relativa, uniforme) por parámetro a partir de los errores por clave o columna"""
+    claves = {**{registro.columnas[c]: c for c in registro.claves}, **{c: c for c in registro.claves}}
+    absoluta = np.zeros(len(registro.claves))
+    relativa = np.zeros(len(registro.claves))
+    uniforme = np.zeros(len(registro.claves), dtype=bool)
+    desconocidos = [nombre for nombre in errores if nombre not in claves]
+    if desconocidos:
+        raise ValueError(f"Parámetros desconocidos en los errores: {desconocidos}")
+
+    for nombre, especificacion in errores.items():
+        j = registro.claves.index(claves[nombre])
+        if not isinstance(especificacion, dict):
+            especificacion = {'sigma': especificacion}
+        sigma = especificacion['sigma']
+        if isinstance(sigma, str) and sigma.strip().endswith('%'):
+            relativa[j] = float(sigma.strip()[:-1]) / 100
+        elif especificacion.get('relativa'):
+            relativa[j] = float(sigma)
+        else:
+            absoluta[j] = float(sigma)
+        distribucion = especificacion.get('distribucion', 'normal')
+        if distribucion not in ('normal', 'uniforme'):
+            raise ValueError(f"{nombre}: distribución desconocida {distribucion!r} (opciones: normal, uniforme)")
+        uniforme[j] = distribucion == 'uniforme'
+    if (absoluta < 0).any() or (relativa < 0).any():
+        raise ValueError("Los errores no pueden ser negativos")
+    return absoluta, relativa, uniforme
+
+
+def simular_incertidumbre(datos, errores, sorteos=SORTEOS, nivel=NIVEL, registro=registro_predeterminado,
+                          semilla=0, tam_bloque=TAM_BLOQUE):
+    """ICA de cada muestra bajo sus errores de medición, por Monte Carlo.
+
+    Devuelve (tabla, sensibilidad):
+    - tabla: una fila por muestra con el ICA y la calidad nominales, la media
+      y el intervalo central de nivel `nivel` del ICA simulado, la
+      probabilidad de que la categoría cambie y la de cada categoría, y el
+      parámetro dominante.
+    - sensibilidad: fracción de la varianza del ICA de cada muestra que
+      aporta cada parámetro (filas suman 1; NaN si el ICA no varía).
+
+    La memoria queda acotada por tam_bloque elementos por parámetro: las
+    muestras (y, si hace falta, los sorteos) se recorren por bloques.
+    """
+    import pandas as pd
+
+    if int(sorteos) != sorteos or sorteos < 1:
+        raise ValueError(f"sorteos debe ser un entero >= 1 (se recibió {sorteos})")
+    if not 0 < nivel < 1:
+        raise ValueError(f"nivel debe estar entre 0 y 1 sin incluirlos (se recibió {nivel})")
+    sorteos = int(sorteos)
+    rng = np.random.default_rng(semilla)
+    absoluta, relativa, uniforme = _especificaciones(errores, registro)
+    inciertos = (absoluta > 0) | (relativa > 0)
+    valores = np.column_stack([np.asarray(datos[registro.columnas[c]], dtype=np.float64) for c in registro.claves])
+    n = len(valores)
+    ica, _, qi = registro.calcular_ica(datos)
+    categoria = registro.indices_calidad(ica)
+    categorias = len(registro.categorias)
+
+    media = np.empty(n)
+    intervalo = np.empty((n, 2))
+    probabilidades = np.empty((n, categorias))
+    varianza = np.zeros((n, len(registro.claves)))
+    filas = max(1, tam_bloque // sorteos)
+    paso = min(sorteos, tam_bloque)
+
+    with etapa('incertidumbre.simulacion'):
+        for a in range(0, n, filas):
+            b = min(a + filas, n)
+            ica_sorteos = np.empty((b - a, sorteos))
+            suma = np.zeros((b - a, len(registro.claves)))
+            suma_cuadrados = np.zeros((b - a, len(registro.claves)))
+            for s in range(0, sorteos, paso):
+                t = min(s + paso, sorteos)
+                # Los parámetros sin error aportan su Qi nominal, en el mismo orden que calcular_ica
+                ica_bloque = np.zeros((b - a, t - s))
+                for j, peso in enumerate(registro.pesos_array):
+                    if not inciertos[j]:
+                        ica_bloque += qi[a:b, j, None] * peso
+                        continue
+                    x = valores[a:b, j, None]
+                    escala = absoluta[j] + relativa[j] * np.abs(x)
+                    if uniforme[j]:
+                        ruido = rng.uniform(-1.0, 1.0, (b - a, t - s))
+                    else:
+                        ruido = rng.standard_normal((b - a, t - s))
+                    perturbado = x + escala * ruido
+                    # Solo se recorta donde el perfil fija un mínimo físico (concentración, turbidez...)
+                    if np.isfinite(registro.minimos_array[j]):
+                        perturbado = np.maximum(perturbado, registro.minimos_array[j])
+                    qi_sorteos = registro.evaluar_parametro(j, perturbado.ravel()).reshape(perturbado.shape)
+                    # Momentos respecto del Qi nominal para no perder precisión al restar
+                    desvio = qi_sorteos - qi[a:b, j, None]
+                    suma[:, j] += desvio.sum(axis=1)
+                    suma_cuadrados[:, j] += (desvio * desvio).sum(axis=1)
+                    ica_bloque += qi_sorteos * peso
+                ica_sorteos[:, s:t] = ica_bloque
+
+            media[a:b] = ica_sorteos.mean(axis=1)
+            intervalo[a:b] = np.quantile(ica_sorteos, [(1 - nivel) / 2, (1 + nivel) / 2], axis=1).T
+            posiciones = registro.indices_calidad(ica_sorteos)
+            for c in range(categorias):
+                probabilidades[a:b, c] = (posiciones == c).mean(axis=1)
+            if sorteos > 1:
+                varianza[a:b] = (suma_cuadrados - suma ** 2 / sorteos) / (sorteos - 1)
+        contar('incertidumbre.sorteos', n * sorteos)
+
+    aportes = np.maximum(varianza, 0.0) * registro.pesos_array ** 2
+    total = aportes.sum(axis=1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        fracciones = np.where(total > 0, aportes / total, np.nan)
+    dominante = np.array(registro.claves, dtype=object)[np.argmax(np.nan_to_num(fracciones, nan=-1.0), axis=1)]
+    dominante[~(total[:, 0] > 0)] = None
+
+    tabla = {
+        'Muestra': np.arange(1, n + 1),
+        'ICA': ica,
+        'Calidad': registro.categorias[categoria],
+        'ICA_medio': media,
+        'ICA_inferior': intervalo[:, 0],
+        'ICA_superior': intervalo[:, 1],
+        'prob_cambio': 1.0 - probabilidades[np.arange(n), categoria],
+    }
+    for c, nombre in enumerate(registro.categorias.tolist()):
+        tabla[f'prob_{nombre}'] = probabilidades[:, c]
+    tabla['parametro_dominante'] = dominante
+    return pd.DataFrame(tabla), pd.DataFrame(fracciones, columns=registro.claves)
+
+
+def mostrar_incertidumbre(tabla, sensibilidad, nivel=NIVEL):
+    """Muestra el intervalo y la probabilidad de cambio por muestra y la sensibilidad media"""
+    print("\n=== INCERTIDUMBRE DEL ICA ===")
+    print(f"{'Muestra':^8} {'ICA':^8} {'Calidad':^12} {f'IC {nivel:.0%}':^17} {'P(cambio)':^10} {'Dominante':^18}")
+    print("-" * 78)
+    for fila in tabla.itertuples(index=False):
+        intervalo = f"[{fila.ICA_inferior:.1f}, {fila.ICA_superior:.1f}]"
+        print(f"{fila.Muestra:^8} {fila.ICA:^8.2f} {fila.Calidad:^12} {intervalo:^17} "
+              f"{fila.prob_cambio:^10.3f} {str(fila.parametro_dominante):^18}")
+
+    print("\nFracción media de la varianza del ICA por parámetro:")
+    for parametro, fraccion in sensibilidad.mean().sort_values(ascending=False).items():
+        if fraccion > 0:
+            print(f"{parametro:20}: {fraccion:6.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incertidumbre del ICA por Monte Carlo")
+    parser.add_argument('entrada', help="archivo xlsx/csv/parquet con las columnas de ICA")
+    parser.add_argument('--errores', required=True, help="JSON con el error de cada parámetro")
+    parser.add_argument('--sorteos', type=int, default=SORTEOS)
+    parser.add_argument('--nivel', type=float, default=NIVEL, help="nivel del intervalo del ICA")
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--salida', help="archivo .csv (por defecto, consola)")
+    parser.add_argument('--perfil', default='predeterminado',
+                        help="perfil de parámetros (nombre en perfiles_ica/ o ruta a un JSON)")
+    args = parser.parse_args()
+    registro = cargar_perfil(args.perfil)
+
+    with open(args.errores, encoding='utf-8') as archivo:
+        errores = json.load(archivo)
+    datos = cargar_columnas(args.entrada, registro.columnas_ica, filtrar_nan=False,
+                            directorio_cache=DIRECTORIO_CACHE)
+    tabla, sensibilidad = simular_incertidumbre(datos, errores, args.sorteos, args.nivel, registro, args.semilla)
+    if args.salida:
+        tabla.join(sensibilidad.add_prefix('sensibilidad_')).to_csv(args.salida, index=False)
+    else:
+        mostrar_incertidumbre(tabla, sensibilidad, args.nivel)
+
+
+if __name__ == "__main__":
+    main()
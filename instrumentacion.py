@@ -0,0 +1,140 @@
+"""Instrumentación: tiempos por etapa, contadores y captura opcional de cProfile/tracemalloc.
+
+Los módulos marcan sus etapas con `etapa('nombre')` y sus cantidades con
+`contar('nombre', n)` sobre el registro global `metricas`; al final de una
+ejecución `emitir()` escribe un resumen JSON de una línea. Variables de
+entorno:
+
+    INTERPOLACION_METRICAS=ruta   agrega el resumen a ese archivo (por defecto, stderr)
+    INTERPOLACION_PERFIL=cprofile,tracemalloc   activa las capturas en perfilar()
+
+Los trabajos que corren en otros procesos (ejecutor, reportes) llevan sus
+propias métricas y no se suman a las del proceso principal.
+"""
+
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+# Funciones más costosas que se incluyen en el resumen cuando se usa cProfile
+FUNCIONES_PERFIL = 15
+
+
+class Metricas:
+    """Tiempos acumulados por etapa (segundos, llamadas) y contadores con nombre"""
+
+    def __init__(self):
+        self.tiempos = defaultdict(lambda: [0.0, 0])
+        self.contadores = defaultdict(int)
+        self.extras = {}
+        self.inicio = time.perf_counter()
+
+    @contextmanager
+    def etapa(self, nombre):
+        """Suma al tiempo de la etapa lo que tarde el bloque with"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            tiempo = self.tiempos[nombre]
+            tiempo[0] += time.perf_counter() - inicio
+            tiempo[1] += 1
+
+    def iterar(self, nombre, iterable):
+        """Recorre iterable sumando a la etapa solo el tiempo de producir cada elemento"""
+        iterador = iter(iterable)
+        while True:
+            with self.etapa(nombre):
+                try:
+                    elemento = next(iterador)
+                except StopIteration:
+                    return
+            yield elemento
+
+    def contar(self, nombre, cantidad=1):
+        self.contadores[nombre] += int(cantidad)
+
+    def reiniciar(self):
+        self.__init__()
+
+    def resumen(self):
+        """Diccionario serializable con tiempos, contadores y capturas"""
+        return {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'pid': os.getpid(),
+            'segundos_totales': time.perf_counter() - self.inicio,
+            'etapas': {nombre: {'segundos': segundos, 'llamadas': llamadas}
+                       for nombre, (segundos, llamadas) in sorted(self.tiempos.items())},
+            'contadores': dict(sorted(self.contadores.items())),
+            **self.extras
+        }
+
+    def emitir(self, destino=None):
+        """Escribe el resumen como una línea JSON en destino, INTERPOLACION_METRICAS o stderr"""
+        destino = destino or os.environ.get('INTERPOLACION_METRICAS')
+        linea = json.dumps(self.resumen(), ensure_ascii=False)
+        if destino:
+            with open(destino, 'a', encoding='utf-8') as archivo:
+                archivo.write(linea + '\n')
+        else:
+            print(linea, file=sys.stderr)
+        return linea
+
+
+metricas = Metricas()
+etapa = metricas.etapa
+contar = metricas.contar
+
+
+def capturas_activas():
+    """Capturas pedidas en INTERPOLACION_PERFIL (subconjunto de {'cprofile', 'tracemalloc'})"""
+    valor = os.environ.get('INTERPOLACION_PERFIL', '')
+    return {c.strip().lower() for c in valor.split(',') if c.strip()}
+
+
+@contextmanager
+def perfilar(cprofile=None, memoria=None, ruta_perfil=None):
+    """Captura cProfile y/o tracemalloc durante el bloque y los agrega al resumen.
+
+    Sin argumentos se usa INTERPOLACION_PERFIL. Con ruta_perfil las
+    estadísticas completas de cProfile se guardan para pstats/snakeviz.
+    """
+    activas = capturas_activas()
+    cprofile = 'cprofile' in activas if cprofile is None else cprofile
+    memoria = 'tracemalloc' in activas if memoria is None else memoria
+
+    perfil = None
+    if cprofile:
+        import cProfile
+        perfil = cProfile.Profile()
+    if memoria:
+        import tracemalloc
+        tracemalloc.start()
+    if perfil:
+        perfil.enable()
+    try:
+        yield metricas
+    finally:
+        if perfil:
+            perfil.disable()
+            metricas.extras['cprofile'] = _funciones_costosas(perfil)
+            if ruta_perfil:
+                perfil.dump_stats(ruta_perfil)
+        if memoria:
+            actual, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            metricas.extras['memoria'] = {'actual_bytes': actual, 'pico_bytes': pico}
+
+
+def _funciones_costosas(perfil, cantidad=FUNCIONES_PERFIL):
+    """Funciones con mayor tiempo acumulado según cProfile"""
+    import pstats
+    estadisticas = pstats.Stats(perfil).stats
+    filas = sorted(estadisticas.items(), key=lambda item: item[1][3], reverse=True)[:cantidad]
+    return [{'funcion': f"{os.path.basename(archivo)}:{linea}({nombre})",
+             'llamadas': llamadas, 'segundos_propios': propio, 'segundos_acumulados': acumulado}
+            for (archivo, linea, nombre), (_, llamadas, propio, acumulado, _) in filas]
@@ -0,0 +1,174 @@
+"""Ajuste por lotes de muchas series (regresión lineal, cuadrática y errores de Lagrange)"""
+
+import numpy as np
+
+from Interpolacion import IndiceNodos, InterpolacionLagrange, error_porcentual, pesos_lagrange
+
+GRADOS_LAGRANGE = (1, 2, 3, 4)
+
+
+def _preparar(x, Y, columna_x, nombres):
+    """Normaliza la entrada a x (n,) o (n, m), Y (n, m) y nombres de series"""
+    if hasattr(Y, 'columns'):
+        raise TypeError("Pasa el DataFrame ancho como primer argumento")
+    if hasattr(x, 'columns'):
+        datos = x
+        if columna_x not in datos.columns:
+            raise ValueError(f"Falta la columna {columna_x!r}; columnas encontradas: {list(datos.columns)}")
+        columnas = [c for c in datos.columns if c != columna_x]
+        x = datos[columna_x].to_numpy(np.float64)
+        Y = datos[columnas].to_numpy(np.float64)
+        nombres = columnas
+    else:
+        x = np.asarray(x, dtype=np.float64)
+        Y = np.asarray(Y, dtype=np.float64)
+        if Y.ndim == 1:
+            Y = Y[:, None]
+    if x.ndim == 2 and x.shape != Y.shape:
+        raise ValueError("Con x por serie, x e Y deben tener la misma forma (n, m)")
+    if nombres is None:
+        nombres = list(range(Y.shape[1]))
+    return x, Y, list(nombres)
+
+
+def regresiones_lote(x, Y):
+    """Regresión lineal y cuadrática de todas las columnas de Y a la vez.
+
+    x puede ser compartida (n,) o por serie (n, m); los NaN se ignoran por serie.
+    Devuelve {grado: (coeficientes (m, grado+1) de mayor a menor potencia, stats)}
+    donde stats es un dict de arrays (m,) con las claves de Regresion.
+    """
+    X = np.broadcast_to(x[:, None] if x.ndim == 1 else x, Y.shape)
+    peso = (np.isfinite(X) & np.isfinite(Y)).astype(np.float64)
+    X = np.where(peso > 0, X, 0.0)
+    Y = np.where(peso > 0, Y, 0.0)
+    n = peso.sum(axis=0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # x centrada y escalada por serie para un sistema bien condicionado
+        media_x = (peso * X).sum(axis=0) / n
+        escala = np.sqrt((peso * (X - media_x) ** 2).sum(axis=0) / n)
+        escala = np.where(escala > 0, escala, 1.0)
+        t = (X - media_x) / escala * peso
+        media_y = (peso * Y).sum(axis=0) / n
+
+        potencias = np.stack([peso, t, t * t, t ** 3, t ** 4])
+        sumas_t = potencias.sum(axis=1)
+        sumas_ty = (potencias[:3] * Y).sum(axis=1)
+
+        dy = (Y - media_y) * peso
+        sst = (dy * dy).sum(axis=0)
+        sxy = (t * dy).sum(axis=0)
+        sxx = (t * t).sum(axis=0)
+        correlacion = np.where((sxx > 0) & (sst > 0), sxy / np.sqrt(sxx * sst), 0.0)
+
+    resultados = {}
+    for grado in (1, 2):
+        k = grado + 1
+        matriz = np.stack([np.stack([sumas_t[i + j] for j in range(k)], axis=-1) for i in range(k)], axis=-2)
+        derecha = sumas_ty[:k].T
+        coef_t = np.full((Y.shape[1], k), np.nan)
+        # cond solo sobre sistemas finitos: una serie sin datos (n = 0) da una matriz NaN y la SVD no converge
+        resolubles = (n >= k) & np.isfinite(matriz).all(axis=(-2, -1))
+        resolubles[resolubles] = np.linalg.cond(matriz[resolubles]) < 1e12
+        if resolubles.any():
+            coef_t[resolubles] = np.linalg.solve(matriz[resolubles], derecha[resolubles][..., None])[..., 0]
+
+        y_pred = sum(coef_t[:, p] * potencias[p] for p in range(1, k)) + coef_t[:, 0]
+        residuos = (Y - y_pred) * peso
+        ajuste = (y_pred - media_y) * peso
+        sse = (residuos * residuos).sum(axis=0)
+        ssr = (ajuste * ajuste).sum(axis=0)
+
+        # c0 + c1·t + c2·t² con t = (x - μ)/s  ->  potencias de x
+        mu, s = media_x, escala
+        if grado == 1:
+            coeficientes = np.column_stack([coef_t[:, 1] / s, coef_t[:, 0] - coef_t[:, 1] * mu / s])
+        else:
+            c0, c1, c2 = coef_t.T
+            coeficientes = np.column_stack([c2 / s ** 2,
+                                            c1 / s - 2 * c2 * mu / s ** 2,
+                                            c0 - c1 * mu / s + c2 * mu ** 2 / s ** 2])
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            stats = {
+                'desviacion_estandar_total': np.sqrt(sst / (n - 1)),
+                'error_estandar_estimado': np.sqrt(sse / (n - 2)),
+                'coeficiente_correlacion': correlacion,
+                'coeficiente_determinacion': np.where(sst != 0, ssr / sst, 0.0)
+            }
+        resultados[grado] = (coeficientes, stats)
+
+    return resultados
+
+
+def errores_lagrange_lote(x, Y, grados=GRADOS_LAGRANGE, tam_bloque=16384):
+    """Errores de dejar-uno-fuera de Lagrange para todas las columnas de Y.
+
+    Con x compartida y sin NaN, los vecinos y los pesos de Lagrange se calculan
+    una sola vez y se aplican a todas las series; en otro caso se recurre a
+    InterpolacionLagrange (backend numpy) serie por serie.
+    Devuelve {grado: errores (n, m)} con NaN en los puntos descartados.
+    """
+    n, m = Y.shape
+    resultados = {grado: np.full((n, m), np.nan) for grado in grados}
+    compartida = x.ndim == 1 and np.isfinite(x).all()
+    completas = np.isfinite(Y).all(axis=0) if compartida else np.zeros(m, dtype=bool)
+
+    if completas.any():
+        Yc = Y[:, completas]
+        indice = IndiceNodos(x)
+        for grado in grados:
+            errores = np.full(Yc.shape, 100.0)
+            if n > grado + 1:
+                vecinos, n_validos = indice.matriz_vecinos(x, grado + 1)
+                filas = np.flatnonzero(n_validos == grado + 1)
+                for inicio in range(0, len(filas), tam_bloque):
+                    bloque = filas[inicio:inicio + tam_bloque]
+                    pesos = pesos_lagrange(x[bloque], x[vecinos[bloque]])
+                    y_interp = np.einsum('nk,nkm->nm', pesos, Yc[vecinos[bloque]])
+                    errores[bloque] = error_porcentual(Yc[bloque], y_interp)[0]
+            resultados[grado][:, completas] = errores
+
+    for j in np.flatnonzero(~completas):
+        xj = x if x.ndim == 1 else x[:, j]
+        validos = np.isfinite(xj) & np.isfinite(Y[:, j])
+        interpolacion = InterpolacionLagrange(xj[validos], Y[validos, j], backend='numpy')
+        for grado in grados:
+            resultados[grado][validos, j] = interpolacion.calcular_error_grado(grado)[1]
+
+    return resultados
+
+
+def ajustar_lote(x, Y=None, grados_lagrange=GRADOS_LAGRANGE, columna_x='x', nombres=None):
+    """Ajusta regresión lineal, cuadrática y curvas de error de Lagrange a muchas series.
+
+    Acepta un DataFrame ancho (columna x y una columna por serie) o arrays x
+    (n,) / (n, m) e Y (n, m). Devuelve un DataFrame ordenado con una fila por
+    serie y modelo.
+    """
+    import pandas as pd
+
+    x, Y, nombres = _preparar(x, Y, columna_x, nombres)
+    regresiones = regresiones_lote(x, Y)
+    errores = errores_lagrange_lote(x, Y, grados_lagrange)
+
+    filas = []
+    for j, nombre in enumerate(nombres):
+        for grado, modelo in ((1, 'lineal'), (2, 'polinomial')):
+            coeficientes, stats = regresiones[grado]
+            filas.append({
+                'serie': nombre, 'modelo': modelo, 'grado': grado,
+                'coeficientes': tuple(coeficientes[j]),
+                **{clave: valor[j] for clave, valor in stats.items()}
+            })
+        for grado in grados_lagrange:
+            error = errores[grado][:, j]
+            error = error[np.isfinite(error)]
+            filas.append({
+                'serie': nombre, 'modelo': 'lagrange', 'grado': grado,
+                'error_medio': error.mean() if len(error) else np.nan,
+                'error_maximo': error.max() if len(error) else np.nan
+            })
+
+    return pd.DataFrame(filas)
@@ -0,0 +1,71 @@
+"""Modelos polinomiales ajustados: coeficientes compactos y predicción vectorizada por Horner"""
+
+import numpy as np
+
+
+def _horner(coeficientes, x):
+    """Evalúa por Horner; coeficientes (k,) o (m, k) de mayor a menor potencia de x"""
+    if coeficientes.ndim == 1:
+        resultado = np.full(x.shape, coeficientes[0])
+        for c in coeficientes[1:]:
+            resultado *= x
+            resultado += c
+        return resultado
+
+    resultado = np.repeat(coeficientes[:, :1], len(x), axis=1)
+    for j in range(1, coeficientes.shape[1]):
+        resultado *= x
+        resultado += coeficientes[:, j:j + 1]
+    return resultado
+
+
+class ModeloPolinomial:
+    """Polinomio ajustado por regresión, listo para predecir en x nuevas sin reajustar"""
+
+    __slots__ = ('coeficientes', 'estadisticas')
+
+    def __init__(self, coeficientes, estadisticas=None):
+        # De mayor a menor potencia de x, como devuelven los métodos de Regresion
+        self.coeficientes = np.ascontiguousarray(coeficientes, dtype=np.float64)
+        self.estadisticas = estadisticas
+
+    @property
+    def grado(self):
+        return len(self.coeficientes) - 1
+
+    def predecir(self, x):
+        """Valores del polinomio en un array de x (escalar si x es escalar)"""
+        x = np.asarray(x, dtype=np.float64)
+        if x.ndim == 0:
+            return float(_horner(self.coeficientes, x.reshape(1))[0])
+        return _horner(self.coeficientes, x)
+
+    __call__ = predecir
+
+    def __repr__(self):
+        terminos = " + ".join(f"{c:.4g}x^{self.grado - i}" for i, c in enumerate(self.coeficientes))
+        return f"ModeloPolinomial({terminos})"
+
+
+def predecir_lote(modelos, x, tam_bloque=65536):
+    """Predicciones de muchos modelos sobre una misma malla: matriz (modelos, len(x)).
+
+    modelos puede ser una lista de ModeloPolinomial (de cualquier grado) o
+    una matriz de coeficientes (m, grado+1) como la de lotes.regresiones_lote.
+    La malla se recorre en bloques de tam_bloque puntos.
+    """
+    if isinstance(modelos, np.ndarray):
+        coeficientes = np.asarray(modelos, dtype=np.float64)
+    else:
+        k = max(len(m.coeficientes) for m in modelos)
+        coeficientes = np.zeros((len(modelos), k))
+        for i, modelo in enumerate(modelos):
+            # Los grados menores se completan con ceros a la izquierda
+            coeficientes[i, k - len(modelo.coeficientes):] = modelo.coeficientes
+
+    x = np.asarray(x, dtype=np.float64).ravel()
+    resultado = np.empty((len(coeficientes), len(x)))
+    for inicio in range(0, len(x), tam_bloque):
+        bloque = slice(inicio, inicio + tam_bloque)
+        resultado[:, bloque] = _horner(coeficientes, x[bloque])
+    return resultado
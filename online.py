@@ -0,0 +1,153 @@
+"""Modo en línea: regresión e interpolación de Lagrange actualizadas punto a punto"""
+
+from bisect import bisect_left
+
+import numpy as np
+
+from Interpolacion import AcumuladorMomentos, error_porcentual, pesos_lagrange
+from modelos import ModeloPolinomial
+
+TOLERANCIA_X = 1e-12
+
+
+class RegresionOnline:
+    """Regresión polinomial que se reajusta en O(1) por punto nuevo (sin guardar los datos)"""
+
+    def __init__(self, grado_max=2):
+        self.acumulador = AcumuladorMomentos(grado_max)
+
+    @property
+    def n(self):
+        return self.acumulador.n
+
+    def agregar(self, x, y):
+        self.acumulador.actualizar(x, y)
+
+    def coeficientes(self, grado):
+        """Coeficientes de mayor a menor potencia de x"""
+        return self.acumulador.coeficientes(grado)[::-1]
+
+    def estadisticas(self, grado):
+        return self.acumulador.estadisticas(grado)
+
+    def modelo(self, grado):
+        """Modelo con los coeficientes actuales (no cambia al agregar más puntos)"""
+        return ModeloPolinomial(self.coeficientes(grado), self.estadisticas(grado))
+
+
+class _Arreglo:
+    """Array float64 que crece con agregados O(1) amortizados"""
+
+    def __init__(self, capacidad=1024):
+        self._datos = np.empty(capacidad)
+        self.n = 0
+
+    def agregar(self, valor):
+        if self.n == len(self._datos):
+            self._datos = np.concatenate([self._datos, np.empty(len(self._datos))])
+        self._datos[self.n] = valor
+        self.n += 1
+
+    @property
+    def valores(self):
+        return self._datos[:self.n]
+
+
+class LagrangeOnline:
+    """Errores de dejar-uno-fuera de Lagrange mantenidos al agregar puntos.
+
+    Mantiene la tabla ordenada de valores distintos de x; al llegar un punto
+    solo se recalculan los puntos cuyo conjunto de vecinos puede cambiar (los
+    que están a menos de grado+1 posiciones del valor nuevo, o los de su mismo
+    valor si ya existía), con el mismo criterio de vecinos más cercanos que
+    InterpolacionLagrange.obtener_puntos_para_grado.
+    """
+
+    def __init__(self, grados=(1, 2, 3, 4)):
+        self.grados = tuple(grados)
+        self.k_max = max(self.grados) + 1
+        self._x = _Arreglo()
+        self._y = _Arreglo()
+        self.valores = []
+        self.grupos = []
+        self._errores = {g: _Arreglo() for g in self.grados}
+        self._y_interp = {g: _Arreglo() for g in self.grados}
+
+    @property
+    def n(self):
+        return self._x.n
+
+    def _posicion(self, x):
+        """Posición del valor distinto x (o donde se insertaría) y si ya existe"""
+        posicion = bisect_left(self.valores, x - TOLERANCIA_X)
+        existe = posicion < len(self.valores) and abs(self.valores[posicion] - x) < TOLERANCIA_X
+        return posicion, existe
+
+    def _vecinos(self, i, k):
+        """k vecinos distintos más cercanos al punto i, excluyéndolo"""
+        x_i = self._x.valores[i]
+        posicion, _ = self._posicion(x_i)
+        propios = self.grupos[posicion]
+        seleccion = [propios[0] if propios[0] != i else propios[1]] if len(propios) > 1 else []
+        izquierda, derecha = posicion - 1, posicion + 1
+        while len(seleccion) < k and (izquierda >= 0 or derecha < len(self.valores)):
+            if derecha >= len(self.valores) or (izquierda >= 0 and
+                    x_i - self.valores[izquierda] <= self.valores[derecha] - x_i):
+                seleccion.append(self.grupos[izquierda][0])
+                izquierda -= 1
+            else:
+                seleccion.append(self.grupos[derecha][0])
+                derecha += 1
+        return seleccion
+
+    def agregar(self, x, y):
+        """Agrega un punto y devuelve los índices cuyos errores se recalcularon"""
+        i = self.n
+        self._x.agregar(x)
+        self._y.agregar(y)
+        for g in self.grados:
+            self._errores[g].agregar(100.0)
+            self._y_interp[g].agregar(y)
+
+        posicion, existe = self._posicion(x)
+        if existe:
+            self.grupos[posicion].append(i)
+            afectados = list(self.grupos[posicion])
+        else:
+            self.valores.insert(posicion, x)
+            self.grupos.insert(posicion, [i])
+            inicio = max(posicion - self.k_max, 0)
+            afectados = [j for grupo in self.grupos[inicio:posicion + self.k_max + 1] for j in grupo]
+
+        if self.n <= self.k_max + 1:
+            # Con pocos puntos cambia el caso n <= grado+1: se recalcula todo
+            afectados = list(range(self.n))
+
+        self._recalcular(np.array(afectados))
+        return afectados
+
+    def _recalcular(self, afectados):
+        x = self._x.valores
+        y = self._y.valores
+        for grado in self.grados:
+            k = grado + 1
+            errores = self._errores[grado].valores
+            y_interp = self._y_interp[grado].valores
+            errores[afectados] = 100.0
+            y_interp[afectados] = y[afectados]
+            if self.n <= k:
+                continue
+
+            vecinos = [self._vecinos(i, k) for i in afectados]
+            completos = np.array([len(v) == k for v in vecinos])
+            if not completos.any():
+                continue
+            filas = afectados[completos]
+            nodos = np.array([v for v, c in zip(vecinos, completos) if c])
+            estimado = (pesos_lagrange(x[filas], x[nodos]) * y[nodos]).sum(axis=1)
+            errores[filas], validos = error_porcentual(y[filas], estimado)
+            y_interp[filas] = np.where(validos, estimado, y[filas])
+
+    def errores(self, grado):
+        """(x, errores, y_interpolados) como InterpolacionLagrange.calcular_error_grado"""
+        return self._x.valores.copy(), self._errores[grado].valores.copy(), self._y_interp[grado].valores.copy()
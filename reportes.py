@@ -0,0 +1,88 @@
+"""Gráficas sin interfaz: importación diferida de matplotlib, diezmado y guardado en paralelo"""
+
+import copy
+import os
+
+import numpy as np
+
+# Puntos máximos por serie dibujada; más allá no se distinguen en pantalla
+PUNTOS_MAXIMOS = 4000
+
+
+def pyplot(headless=False):
+    """Importa matplotlib.pyplot solo cuando se necesita (con Agg si headless)"""
+    if headless:
+        import matplotlib
+        matplotlib.use('Agg', force=True)
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def diezmar(x, y, n_max=PUNTOS_MAXIMOS):
+    """Reduce una serie a ~n_max puntos conservando su envolvente.
+
+    Ordena por x, la parte en cubetas de igual cantidad de puntos y de cada
+    una conserva el primero, el último, el mínimo y el máximo, así que los
+    picos siguen visibles. Las series cortas se devuelven sin cambios.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if len(x) <= n_max:
+        return x, y
+
+    orden = np.argsort(x, kind='stable')
+    x, y = x[orden], y[orden]
+    n_cubetas = max(n_max // 4, 1)
+    ancho = -(-len(x) // n_cubetas)
+    relleno = n_cubetas * ancho - len(x)
+    cubetas = np.concatenate([y, np.full(relleno, np.nan)]).reshape(-1, ancho)
+    inicio = np.arange(len(cubetas)) * ancho
+
+    indices = np.concatenate([
+        inicio,
+        np.minimum(inicio + ancho - 1, len(x) - 1),
+        inicio + np.argmin(np.where(np.isnan(cubetas), np.inf, cubetas), axis=1),
+        inicio + np.argmax(np.where(np.isnan(cubetas), -np.inf, cubetas), axis=1),
+    ])
+    indices = np.unique(np.minimum(indices, len(x) - 1))
+    return x[indices], y[indices]
+
+
+def _guardar_figura(objeto, metodo, argumentos, rutas):
+    """Trabajo de un proceso: construye la figura con Agg y la guarda en cada formato"""
+    plt = pyplot(headless=True)
+    figura = getattr(objeto, metodo)(*argumentos)
+    for ruta in rutas:
+        figura.savefig(ruta)
+    plt.close(figura)
+    return rutas
+
+
+def generar_reporte(regresion, interpolacion, directorio, formatos=('png',),
+                    resultados_regresion=None, resultados_interpolacion=None, max_workers=None):
+    """Guarda las gráficas de regresión y de interpolación sin abrir ventanas.
+
+    Cada figura se dibuja en su propio proceso (backend Agg) y se escribe en
+    todos los formatos pedidos; devuelve la lista de archivos generados.
+    """
+    os.makedirs(directorio, exist_ok=True)
+    if resultados_regresion is None:
+        y_lineal, y_poli, stats_lin, stats_pol = regresion.mostrar_resultados()
+        resultados_regresion = (y_lineal, y_poli, stats_lin, stats_pol)
+    if resultados_interpolacion is None:
+        resultados_interpolacion = interpolacion.calcular_errores()
+
+    # La caché no viaja a los procesos: las figuras solo usan los resultados ya calculados
+    regresion, interpolacion = copy.copy(regresion), copy.copy(interpolacion)
+    regresion.cache = interpolacion.cache = None
+    trabajos = [
+        (regresion, 'graficar_resultados', resultados_regresion, 'regresion'),
+        (interpolacion, 'graficar_errores', (resultados_interpolacion,), 'interpolacion'),
+    ]
+    # multiprocessing se importa aquí para no encarecer el arranque de quien no grafica
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=max_workers or len(trabajos)) as pool:
+        futuros = [pool.submit(_guardar_figura, objeto, metodo, argumentos,
+                               [os.path.join(directorio, f"{nombre}.{formato}") for formato in formatos])
+                   for objeto, metodo, argumentos, nombre in trabajos]
+        return [ruta for futuro in futuros for ruta in futuro.result()]
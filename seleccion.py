@@ -0,0 +1,250 @@
+"""Selección automática de modelo por validación cruzada (dejar-uno-fuera o k pliegues).
+
+Compara regresión polinomial de grado 1..N y Lagrange local de grado 1..M
+con las predicciones de validación de cada punto:
+
+- Regresión, dejar-uno-fuera: forma cerrada con la diagonal de la matriz
+  sombrero, ŷ₋ᵢ = yᵢ - eᵢ / (1 - hᵢᵢ); una sola QR sirve para todos los grados.
+- Regresión, k pliegues: ecuaciones normales en base de Chebyshev sobre x
+  escalada a [-1, 1], restando a la matriz de Gram total la de cada pliegue
+  (sin reajustar desde cero) y resolviendo todos los pliegues en lote.
+- Lagrange: vecinos más cercanos como calcular_error_grado; en k pliegues los
+  vecinos de cada punto se buscan solo entre los puntos de entrenamiento.
+
+Todas las series de una matriz Y con x compartida se evalúan juntas.
+"""
+
+import numpy as np
+
+from Interpolacion import IndiceNodos, error_porcentual, pesos_lagrange
+
+CRITERIOS = ('rmse', 'mae', 'error_medio')
+GRADOS_REGRESION = (1, 2, 3, 4, 5)
+GRADOS_LAGRANGE = (1, 2, 3, 4)
+
+
+def _escalar(x):
+    """x llevada a [-1, 1] (base de Chebyshev bien condicionada)"""
+    x_min, x_max = float(x.min()), float(x.max())
+    if x_max - x_min < 1e-12:
+        x_min, x_max = x_min - 1.0, x_max + 1.0
+    return (2 * x - (x_min + x_max)) / (x_max - x_min)
+
+
+def asignar_pliegues(n, pliegues, semilla=0):
+    """Pliegue (0..pliegues-1) de cada punto, con tamaños que difieren a lo sumo en uno"""
+    return np.random.default_rng(semilla).permutation(np.arange(n) % pliegues)
+
+
+# --- Predicciones de validación: {grado: (n, m)} con NaN donde no hay estimación ---
+
+def predicciones_regresion_loo(x, Y, grados=GRADOS_REGRESION):
+    """Predicciones de dejar-uno-fuera de la regresión polinomial en forma cerrada"""
+    n = len(x)
+    grado_max = max(grados)
+    Q, R = np.linalg.qr(np.polynomial.chebyshev.chebvander(_escalar(x), grado_max))
+    qty = Q.T @ Y
+    diagonal = np.abs(np.diag(R))
+
+    resultados = {}
+    y_ajustada = np.zeros_like(Y)
+    sombrero = np.zeros(n)
+    # Con n <= grado_max la QR reducida tiene solo n columnas
+    for k in range(min(grado_max + 1, Q.shape[1])):
+        # Q es anidada: las primeras k+1 columnas generan los polinomios de grado k
+        y_ajustada += Q[:, k:k + 1] * qty[k]
+        sombrero += Q[:, k] ** 2
+        if k not in grados:
+            continue
+        if n <= k + 1 or diagonal[:k + 1].min() < 1e-12 * diagonal[:k + 1].max():
+            resultados[k] = np.full(Y.shape, np.nan)
+            continue
+        libertad = 1.0 - sombrero
+        libertad[libertad < 1e-12] = np.nan
+        resultados[k] = Y - (Y - y_ajustada) / libertad[:, None]
+    for k in grados:
+        # Grados con más coeficientes que puntos: sin estimación
+        resultados.setdefault(k, np.full(Y.shape, np.nan))
+    return resultados
+
+
+def predicciones_regresion_pliegues(x, Y, pliegue, grados=GRADOS_REGRESION):
+    """Predicciones de k pliegues de la regresión polinomial (Gram total menos la de cada pliegue)"""
+    grado_max = max(grados)
+    V = np.polynomial.chebyshev.chebvander(_escalar(x), grado_max)
+    n_pliegues = pliegue.max() + 1
+    gram = np.stack([V[pliegue == f].T @ V[pliegue == f] for f in range(n_pliegues)])
+    vy = np.stack([V[pliegue == f].T @ Y[pliegue == f] for f in range(n_pliegues)])
+    gram = gram.sum(axis=0) - gram
+    vy = vy.sum(axis=0) - vy
+
+    resultados = {}
+    for grado in grados:
+        k = grado + 1
+        try:
+            coeficientes = np.linalg.solve(gram[:, :k, :k], vy[:, :k])
+        except np.linalg.LinAlgError:
+            resultados[grado] = np.full(Y.shape, np.nan)
+            continue
+        resultados[grado] = np.einsum('nk,nkm->nm', V[:, :k], coeficientes[pliegue])
+    return resultados
+
+
+def _lagrange_desde_vecinos(x_eval, x, Y, vecinos, n_validos, grados, tam_bloque):
+    """Predicciones de Lagrange de cada grado con los primeros grado+1 vecinos de cada fila"""
+    resultados = {}
+    for grado in grados:
+        k = grado + 1
+        prediccion = np.full((len(x_eval), Y.shape[1]), np.nan)
+        filas = np.flatnonzero(n_validos >= k)
+        # tam_bloque limita filas × series, para acotar la memoria del einsum
+        paso = max(tam_bloque // Y.shape[1], 1)
+        for inicio in range(0, len(filas), paso):
+            bloque = filas[inicio:inicio + paso]
+            nodos = vecinos[bloque, :k]
+            pesos = pesos_lagrange(x_eval[bloque], x[nodos])
+            prediccion[bloque] = np.einsum('nk,nkm->nm', pesos, Y[nodos])
+        resultados[grado] = prediccion
+    return resultados
+
+
+def predicciones_lagrange_loo(x, Y, grados=GRADOS_LAGRANGE, tam_bloque=2 ** 18):
+    """Predicciones de dejar-uno-fuera de Lagrange (los mismos vecinos que calcular_error_grado)"""
+    n = len(x)
+    k_max = max(grados) + 1
+    if n <= min(grados) + 1:
+        return {grado: np.full(Y.shape, np.nan) for grado in grados}
+    vecinos, n_validos = IndiceNodos(x).matriz_vecinos(x, k_max)
+    resultados = _lagrange_desde_vecinos(x, x, Y, vecinos, n_validos, grados, tam_bloque)
+    for grado in grados:
+        if n <= grado + 1:
+            resultados[grado][:] = np.nan
+    return resultados
+
+
+def predicciones_lagrange_pliegues(x, Y, pliegue, grados=GRADOS_LAGRANGE, tam_bloque=2 ** 18):
+    """Predicciones de k pliegues de Lagrange con vecinos buscados solo en el entrenamiento"""
+    k_max = max(grados) + 1
+    resultados = {grado: np.full(Y.shape, np.nan) for grado in grados}
+    for f in range(pliegue.max() + 1):
+        prueba = np.flatnonzero(pliegue == f)
+        entrenamiento = np.flatnonzero(pliegue != f)
+        x_entrenamiento = x[entrenamiento]
+        vecinos, n_validos = IndiceNodos(x_entrenamiento).matriz_cercanos(x[prueba], k_max)
+        parciales = _lagrange_desde_vecinos(x[prueba], x_entrenamiento, Y[entrenamiento],
+                                            vecinos, n_validos, grados, tam_bloque)
+        for grado in grados:
+            resultados[grado][prueba] = parciales[grado]
+    return resultados
+
+
+# --- Puntajes y selección ---
+
+def puntajes(Y, prediccion):
+    """rmse, mae y error_medio (%) por serie; rmse y mae son inf si falta alguna predicción"""
+    with np.errstate(invalid='ignore', over='ignore'):
+        residuo = Y - prediccion
+        completas = np.isfinite(residuo).all(axis=0)
+        return {
+            'rmse': np.where(completas, np.sqrt(np.mean(residuo ** 2, axis=0)), np.inf),
+            'mae': np.where(completas, np.mean(np.abs(residuo), axis=0), np.inf),
+            # Con las reglas de calcular_error_grado: lo no estimable cuenta como 100 %
+            'error_medio': error_porcentual(Y, prediccion)[0].mean(axis=0)
+        }
+
+
+def evaluar_modelos(x, Y, grados_regresion=GRADOS_REGRESION, grados_lagrange=GRADOS_LAGRANGE,
+                    pliegues=None, semilla=0):
+    """Puntajes de validación {(modelo, grado): {criterio: array (m,)}} para todas las series.
+
+    pliegues=None usa dejar-uno-fuera; un entero k usa k pliegues al azar
+    (los mismos para todos los modelos).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    Y = np.asarray(Y, dtype=np.float64)
+    if Y.ndim == 1:
+        Y = Y[:, None]
+    if x.ndim != 1 or len(x) != len(Y):
+        raise ValueError("x debe ser un vector compartido con una fila por fila de Y")
+    if not (np.isfinite(x).all() and np.isfinite(Y).all()):
+        raise ValueError("Los datos no deben tener NaN (límpialos como cargar_xy)")
+
+    grados_regresion = tuple(grados_regresion)
+    grados_lagrange = tuple(grados_lagrange)
+    if pliegues is None:
+        predicciones = {
+            'regresion': predicciones_regresion_loo(x, Y, grados_regresion) if grados_regresion else {},
+            'lagrange': predicciones_lagrange_loo(x, Y, grados_lagrange) if grados_lagrange else {}
+        }
+    else:
+        if not 2 <= pliegues <= len(x):
+            raise ValueError(f"pliegues debe estar entre 2 y {len(x)}")
+        pliegue = asignar_pliegues(len(x), pliegues, semilla)
+        predicciones = {
+            'regresion': predicciones_regresion_pliegues(x, Y, pliegue, grados_regresion) if grados_regresion else {},
+            'lagrange': predicciones_lagrange_pliegues(x, Y, pliegue, grados_lagrange) if grados_lagrange else {}
+        }
+
+    return {(modelo, grado): puntajes(Y, prediccion)
+            for modelo, por_grado in predicciones.items()
+            for grado, prediccion in sorted(por_grado.items())}
+
+
+def seleccionar_modelo(x, y, grados_regresion=GRADOS_REGRESION, grados_lagrange=GRADOS_LAGRANGE,
+                       pliegues=None, criterio='rmse', semilla=0):
+    """Mejor modelo de una serie y tabla de puntajes ordenada del mejor al peor.
+
+    Cada fila de la tabla es {'modelo', 'grado', 'rmse', 'mae', 'error_medio'};
+    el mejor modelo es la primera fila.
+    """
+    if criterio not in CRITERIOS:
+        raise ValueError(f"Criterio desconocido: {criterio!r} (opciones: {CRITERIOS})")
+    evaluacion = evaluar_modelos(x, y, grados_regresion, grados_lagrange, pliegues, semilla)
+    tabla = [{'modelo': modelo, 'grado': grado, **{c: float(v[0]) for c, v in valores.items()}}
+             for (modelo, grado), valores in evaluacion.items()]
+    tabla.sort(key=lambda fila: fila[criterio])
+    return tabla[0], tabla
+
+
+def seleccionar_modelos_lote(x, Y=None, grados_regresion=GRADOS_REGRESION, grados_lagrange=GRADOS_LAGRANGE,
+                             pliegues=None, criterio='rmse', semilla=0, columna_x='x', nombres=None):
+    """Selección de modelo para muchas series con x compartida (arrays o DataFrame ancho).
+
+    Devuelve (mejores, tabla): DataFrames con el mejor modelo de cada serie y
+    con todos los puntajes (una fila por serie y modelo).
+    """
+    import pandas as pd
+    from lotes import _preparar
+
+    if criterio not in CRITERIOS:
+        raise ValueError(f"Criterio desconocido: {criterio!r} (opciones: {CRITERIOS})")
+    x, Y, nombres = _preparar(x, Y, columna_x, nombres)
+    evaluacion = evaluar_modelos(x, Y, grados_regresion, grados_lagrange, pliegues, semilla)
+
+    modelos = list(evaluacion)
+    valores = np.stack([evaluacion[m][criterio] for m in modelos])
+    mejor = np.argmin(valores, axis=0)
+
+    tabla = pd.DataFrame([
+        {'serie': nombre, 'modelo': modelo, 'grado': grado,
+         **{c: v[j] for c, v in evaluacion[(modelo, grado)].items()},
+         'mejor': i == mejor[j]}
+        for j, nombre in enumerate(nombres)
+        for i, (modelo, grado) in enumerate(modelos)
+    ])
+    mejores = tabla[tabla['mejor']].drop(columns='mejor').reset_index(drop=True)
+    return mejores, tabla
+
+
+def mostrar_seleccion(tabla, criterio='rmse'):
+    """Muestra la tabla de puntajes de seleccionar_modelo"""
+    print("\n" + "="*70)
+    print(f"SELECCIÓN AUTOMÁTICA DE MODELO (validación cruzada, criterio: {criterio})")
+    print("="*70)
+    print(f"{'modelo':<12} {'grado':<7} {'rmse':<12} {'mae':<12} {'error %':<12}")
+    print("-" * 55)
+    for fila in tabla:
+        print(f"{fila['modelo']:<12} {fila['grado']:<7} {fila['rmse']:<12.4f} {fila['mae']:<12.4f} "
+              f"{fila['error_medio']:<12.4f}")
+    mejor = tabla[0]
+    print(f"➜ Mejor modelo: {mejor['modelo']} de grado {mejor['grado']}")
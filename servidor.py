@@ -0,0 +1,308 @@
+"""Servicio local de puntuación (ICA) y ajustes (Lagrange, regresión) sobre asyncio.
+
+Un proceso de larga duración que importa y compila todo una sola vez y
+atiende peticiones JSON de una línea por un socket Unix o por localhost:
+
+    python servidor.py --unix /tmp/ica.sock
+    python servidor.py --puerto 8765 --max-espera-ms 1
+
+Peticiones (cada una con un "id" opcional que se devuelve en la respuesta):
+
+    {"id": 1, "op": "ica", "muestra": {"pH": 7.1, "Temperatura": 21, ...}}
+    {"id": 2, "op": "regresion", "x": [...], "y": [...], "grado": 2}
+    {"id": 3, "op": "lagrange", "x": [...], "y": [...], "grados": [1, 2], "backend": "numpy"}
+    {"id": 4, "op": "estado"}
+
+Las peticiones "ica" concurrentes (de una o varias conexiones) se juntan en
+micro-lotes que se puntúan con una sola llamada vectorizada: un lote sale al
+llenarse o cuando la más antigua lleva max_espera esperando (por defecto
+cero: el lote junta lo que llegó mientras se puntuaba el anterior). Una conexión
+puede enviar varias peticiones sin esperar respuesta; las respuestas llegan
+en orden de terminación y se emparejan por "id". En una muestra, un
+parámetro ausente o null se trata como NaN, y los valores no finitos del
+resultado se devuelven como null.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import stat
+import time
+from collections import defaultdict, deque
+
+import numpy as np
+
+from ica_vectorizado import cargar_perfil
+from Interpolacion import InterpolacionLagrange, Regresion
+
+MAX_LOTE = 1024
+# Sin espera extra por defecto: el reloj del bucle redondea los plazos a ~1 ms
+MAX_ESPERA = 0.0
+# Latencias recientes guardadas por operación para los percentiles
+MUESTRAS_LATENCIA = 10000
+# Largo máximo de una línea de petición (los ajustes pueden traer muchos puntos)
+LIMITE_LINEA = 64 * 2 ** 20
+
+
+class Latencias:
+    """Latencias recientes por operación y tamaños de lote, con percentiles p50/p99"""
+
+    def __init__(self, maximo=MUESTRAS_LATENCIA):
+        self.por_operacion = defaultdict(lambda: deque(maxlen=maximo))
+        self.lotes = deque(maxlen=maximo)
+        self.total = defaultdict(int)
+
+    def registrar(self, operacion, segundos):
+        self.por_operacion[operacion].append(segundos)
+        self.total[operacion] += 1
+
+    def resumen(self):
+        resumen = {}
+        for operacion, valores in self.por_operacion.items():
+            p50, p99 = np.percentile(np.fromiter(valores, float), [50, 99]) * 1e3
+            resumen[operacion] = {'peticiones': self.total[operacion], 'p50_ms': p50, 'p99_ms': p99}
+        if self.lotes:
+            resumen['lotes_ica'] = {'cantidad': len(self.lotes), 'tamano_medio': float(np.mean(self.lotes))}
+        return resumen
+
+
+class LotesICA:
+    """Junta muestras de ICA concurrentes y las puntúa en lotes vectorizados"""
+
+    def __init__(self, registro, max_lote=MAX_LOTE, max_espera=MAX_ESPERA, latencias=None):
+        self.registro = registro
+        self.max_lote = max_lote
+        self.max_espera = max_espera
+        self.latencias = latencias
+        self.pendientes = deque()
+        self._hay = asyncio.Event()
+        self._lleno = asyncio.Event()
+        self._tarea = None
+
+    def iniciar(self):
+        self._tarea = asyncio.get_running_loop().create_task(self._procesar())
+
+    async def detener(self):
+        if self._tarea:
+            self._tarea.cancel()
+            try:
+                await self._tarea
+            except asyncio.CancelledError:
+                pass
+
+    def _valores(self, muestra):
+        """Valores de la muestra en el orden de columnas_ica (faltantes = NaN); ValueError si no es válida"""
+        if not isinstance(muestra, dict):
+            raise ValueError(f"\"muestra\" debe ser un objeto {{columna: valor}}, no {type(muestra).__name__}")
+        columnas = self.registro.columnas_ica
+        desconocidas = sorted(set(muestra) - set(columnas))
+        if desconocidas:
+            raise ValueError(f"Columnas desconocidas: {desconocidas} (esperadas: {', '.join(columnas)})")
+        valores = []
+        for c in columnas:
+            valor = muestra.get(c)
+            if valor is not None and (isinstance(valor, bool) or not isinstance(valor, (int, float))):
+                raise ValueError(f"{c}: se esperaba un número o null, no {valor!r}")
+            valores.append(np.nan if valor is None else float(valor))
+        return valores
+
+    async def puntuar(self, muestra):
+        """ICA, calidad y Qi de una muestra (espera a que salga su lote)"""
+        # Se valida aquí para que una muestra mala solo falle en su propia petición
+        valores = self._valores(muestra)
+        futuro = asyncio.get_running_loop().create_future()
+        self.pendientes.append((valores, futuro))
+        self._hay.set()
+        if len(self.pendientes) >= self.max_lote:
+            self._lleno.set()
+        return await futuro
+
+    async def _procesar(self):
+        while True:
+            await self._hay.wait()
+            # Una vuelta del bucle deja encolarse a las líneas ya leídas; sin espera, el
+            # lote junta lo que llegó mientras se puntuaba el anterior
+            await asyncio.sleep(0)
+            if len(self.pendientes) < self.max_lote and self.max_espera > 0:
+                try:
+                    await asyncio.wait_for(self._lleno.wait(), self.max_espera)
+                except asyncio.TimeoutError:
+                    pass
+            lote = [self.pendientes.popleft() for _ in range(min(len(self.pendientes), self.max_lote))]
+            if len(self.pendientes) < self.max_lote:
+                self._lleno.clear()
+            if not self.pendientes:
+                self._hay.clear()
+            try:
+                self._puntuar_lote(lote)
+            except Exception as e:
+                # Un lote que falla solo afecta a sus peticiones; el bucle sigue atendiendo
+                for _, futuro in lote:
+                    if not futuro.done():
+                        futuro.set_exception(e)
+
+    def _puntuar_lote(self, pendientes):
+        valores = np.array([v for v, _ in pendientes], dtype=np.float64).reshape(len(pendientes), -1)
+        datos = dict(zip(self.registro.columnas_ica, valores.T))
+        ica, calidad, qi = self.registro.calcular_ica(datos)
+        if self.latencias is not None:
+            self.latencias.lotes.append(len(pendientes))
+        claves = self.registro.claves
+        for i, (_, futuro) in enumerate(pendientes):
+            if not futuro.done():
+                futuro.set_result({'ica': float(ica[i]), 'calidad': str(calidad[i]),
+                                   'qi': dict(zip(claves, qi[i].tolist()))})
+
+
+def _a_json(valor):
+    """Convierte resultados con arrays y escalares NumPy a tipos de JSON (NaN e infinitos a null)"""
+    if isinstance(valor, dict):
+        return {str(k): _a_json(v) for k, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [_a_json(v) for v in valor]
+    if isinstance(valor, np.ndarray):
+        return _a_json(valor.tolist())
+    if isinstance(valor, np.generic):
+        valor = valor.item()
+    if isinstance(valor, float) and not math.isfinite(valor):
+        return None
+    return valor
+
+
+def _datos_xy(peticion):
+    x = np.asarray(peticion['x'], dtype=np.float64)
+    y = np.asarray(peticion['y'], dtype=np.float64)
+    if x.shape != y.shape or x.ndim != 1:
+        raise ValueError("x e y deben ser listas del mismo largo")
+    return x, y
+
+
+def ajustar_regresion(peticion):
+    x, y = _datos_xy(peticion)
+    modelo = Regresion(x, y).modelo(int(peticion.get('grado', 1)), peticion.get('base', 'monomial'))
+    return {'coeficientes': modelo.coeficientes, 'estadisticas': modelo.estadisticas}
+
+
+def ajustar_lagrange(peticion):
+    x, y = _datos_xy(peticion)
+    interpolacion = InterpolacionLagrange(x, y, backend=peticion.get('backend', 'numpy'))
+    resultados = interpolacion.calcular_errores(peticion.get('grados', (1, 2, 3, 4)))
+    return {'errores': {grado: {'errores': errores, 'y_interpolados': y_interp}
+                        for grado, (_, errores, y_interp) in resultados.items()}}
+
+
+AJUSTES = {'regresion': ajustar_regresion, 'lagrange': ajustar_lagrange}
+
+
+class Servidor:
+    """Atiende conexiones y despacha cada petición según su "op" """
+
+    def __init__(self, registro, max_lote=MAX_LOTE, max_espera=MAX_ESPERA, limite_linea=LIMITE_LINEA):
+        self.limite_linea = limite_linea
+        self.latencias = Latencias()
+        self.lotes = LotesICA(registro, max_lote, max_espera, self.latencias)
+
+    async def responder(self, peticion):
+        operacion = peticion.get('op')
+        if operacion == 'ica':
+            return await self.lotes.puntuar(peticion.get('muestra', {}))
+        if operacion in AJUSTES:
+            # Los ajustes grandes no deben frenar los lotes de ICA
+            return await asyncio.to_thread(AJUSTES[operacion], peticion)
+        if operacion == 'estado':
+            return self.latencias.resumen()
+        raise ValueError(f"Operación desconocida: {operacion!r} (opciones: ica, regresion, lagrange, estado)")
+
+    async def _atender(self, linea, escritor, escritura):
+        inicio = time.perf_counter()
+        identificador = None
+        try:
+            peticion = json.loads(linea)
+            if not isinstance(peticion, dict):
+                raise ValueError("La petición debe ser un objeto JSON")
+            identificador = peticion.get('id')
+            respuesta = {'id': identificador, **await self.responder(peticion)}
+            self.latencias.registrar(peticion.get('op'), time.perf_counter() - inicio)
+        except Exception as e:
+            respuesta = {'id': identificador, 'error': f"{type(e).__name__}: {e}"}
+        await self._enviar(respuesta, escritor, escritura)
+
+    async def _enviar(self, respuesta, escritor, escritura):
+        async with escritura:
+            escritor.write(json.dumps(_a_json(respuesta), allow_nan=False).encode() + b'\n')
+            await escritor.drain()
+
+    async def conexion(self, lector, escritor):
+        tareas = set()
+        escritura = asyncio.Lock()
+        try:
+            while True:
+                try:
+                    linea = await lector.readline()
+                except ValueError:
+                    # Línea más larga que limite_linea: sin su final no se puede
+                    # seguir leyendo con seguridad, así que se responde y se cierra
+                    error = {'id': None, 'error': f"La petición supera el límite de {self.limite_linea} bytes"}
+                    tareas.add(asyncio.create_task(self._enviar(error, escritor, escritura)))
+                    break
+                if not linea:
+                    break
+                if linea.strip():
+                    tarea = asyncio.create_task(self._atender(linea, escritor, escritura))
+                    tareas.add(tarea)
+                    tarea.add_done_callback(tareas.discard)
+            if tareas:
+                await asyncio.gather(*tareas)
+        except ConnectionError:
+            pass
+        finally:
+            escritor.close()
+
+    async def ejecutar(self, unix=None, host='127.0.0.1', puerto=8765):
+        if unix and os.path.exists(unix):
+            # Solo se reemplaza un socket viejo: un --unix mal escrito no debe borrar un archivo
+            if not stat.S_ISSOCK(os.stat(unix).st_mode):
+                raise ValueError(f"{unix} existe y no es un socket; no se reemplaza")
+            os.remove(unix)
+        self.lotes.iniciar()
+        if unix:
+            servidor = await asyncio.start_unix_server(self.conexion, path=unix, limit=self.limite_linea)
+            print(f"Escuchando en {unix}")
+        else:
+            servidor = await asyncio.start_server(self.conexion, host, puerto, limit=self.limite_linea)
+            print(f"Escuchando en {host}:{puerto}")
+        try:
+            async with servidor:
+                await servidor.serve_forever()
+        finally:
+            await self.lotes.detener()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio local de ICA, interpolación y regresión")
+    parser.add_argument('--unix', help="ruta del socket Unix (por defecto, TCP en localhost)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=8765)
+    parser.add_argument('--max-lote', type=int, default=MAX_LOTE, help="muestras de ICA por lote")
+    parser.add_argument('--max-espera-ms', type=float, default=MAX_ESPERA * 1e3,
+                        help="espera máxima de una muestra antes de puntuar un lote incompleto")
+    parser.add_argument('--max-linea-mb', type=float, default=LIMITE_LINEA / 2 ** 20,
+                        help="largo máximo de una petición")
+    parser.add_argument('--perfil', default='predeterminado',
+                        help="perfil de parámetros (nombre en perfiles_ica/ o ruta a un JSON)")
+    args = parser.parse_args()
+
+    servidor = Servidor(cargar_perfil(args.perfil), args.max_lote, args.max_espera_ms / 1e3,
+                        int(args.max_linea_mb * 2 ** 20))
+    try:
+        asyncio.run(servidor.ejecutar(args.unix, args.host, args.puerto))
+    except ValueError as e:
+        parser.exit(1, f"Error: {e}\n")
+    except KeyboardInterrupt:
+        print(json.dumps(_a_json(servidor.latencias.resumen())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""Interpolación por splines (cúbica natural y monótona PCHIP) para conjuntos grandes.
+
+Los nodos se ordenan y se agrupan una sola vez (los valores de x repetidos
+se promedian), la spline cúbica resuelve su sistema tridiagonal en O(n) y la
+evaluación busca el tramo de cada x de consulta por búsqueda binaria y
+evalúa su cúbica por Horner, todo sobre arrays.
+"""
+
+import numpy as np
+
+from Interpolacion import error_porcentual
+
+TIPOS_SPLINE = ('cubica', 'pchip')
+
+# Nodos a cada lado en el dejar-uno-fuera de la spline cúbica: el efecto del
+# borde de la ventana decae al menos como 2^-VENTANA_CUBICA
+VENTANA_CUBICA = 30
+# La PCHIP es local: tres nodos por lado reproducen exactamente la global
+VENTANA_PCHIP = 3
+
+
+def _resolver_tridiagonal(inferior, diagonal, superior, derecha):
+    """Algoritmo de Thomas sobre el último eje (los ejes anteriores son sistemas independientes)"""
+    n = diagonal.shape[-1]
+    if diagonal.ndim == 1:
+        # Un solo sistema: el bucle con floats de Python es mucho más rápido que con escalares NumPy
+        inferior, diagonal, superior, derecha = (v.tolist() for v in (inferior, diagonal, superior, derecha))
+        c = [0.0] * n
+        d = [0.0] * n
+        for i in range(n):
+            divisor = diagonal[i] - (inferior[i] * c[i - 1] if i else 0.0)
+            c[i] = superior[i] / divisor
+            d[i] = (derecha[i] - (inferior[i] * d[i - 1] if i else 0.0)) / divisor
+        for i in range(n - 2, -1, -1):
+            d[i] -= c[i] * d[i + 1]
+        return np.array(d)
+
+    # Con el eje del sistema primero, cada paso opera sobre memoria contigua
+    inferior, diagonal, superior, derecha = (np.ascontiguousarray(np.moveaxis(v, -1, 0))
+                                             for v in (inferior, diagonal, superior, derecha))
+    c = np.zeros(diagonal.shape)
+    d = np.zeros(diagonal.shape)
+    for i in range(n):
+        divisor = diagonal[i] - (inferior[i] * c[i - 1] if i else 0.0)
+        c[i] = superior[i] / divisor
+        d[i] = (derecha[i] - (inferior[i] * d[i - 1] if i else 0.0)) / divisor
+    for i in range(n - 2, -1, -1):
+        d[i] -= c[i] * d[i + 1]
+    return np.moveaxis(d, 0, -1)
+
+
+def _tomar(valores, tramo):
+    """valores[..., tramo] por fila (tramo None: todos)"""
+    return valores if tramo is None else np.take_along_axis(valores, tramo[:, None], axis=-1)[:, 0]
+
+
+def _coeficientes_cubica(x, y, tramo=None):
+    """Coeficientes (a, b, c, d) por tramo de la spline cúbica natural; x estrictamente creciente.
+
+    Con tramo (uno por fila) solo se arman los coeficientes de ese tramo.
+    """
+    h = np.diff(x, axis=-1)
+    pendiente = np.diff(y, axis=-1) / h
+    segundas = np.zeros(x.shape)
+    if x.shape[-1] > 2:
+        inferior = h[..., :-1].copy()
+        superior = h[..., 1:].copy()
+        inferior[..., 0] = 0.0
+        superior[..., -1] = 0.0
+        segundas[..., 1:-1] = _resolver_tridiagonal(
+            inferior, 2 * (h[..., :-1] + h[..., 1:]), superior, 6 * np.diff(pendiente, axis=-1))
+
+    h, pendiente, y0 = _tomar(h, tramo), _tomar(pendiente, tramo), _tomar(y[..., :-1], tramo)
+    m0, m1 = _tomar(segundas[..., :-1], tramo), _tomar(segundas[..., 1:], tramo)
+    return np.stack([y0, pendiente - h * (2 * m0 + m1) / 6, m0 / 2, (m1 - m0) / (6 * h)], axis=-1)
+
+
+def _derivada_borde(h0, h1, p0, p1):
+    """Derivada en un extremo de la PCHIP (fórmula de tres puntos con la corrección de forma)"""
+    d = ((2 * h0 + h1) * p0 - h0 * p1) / (h0 + h1)
+    d = np.where(np.sign(d) != np.sign(p0), 0.0, d)
+    return np.where((np.sign(p0) != np.sign(p1)) & (np.abs(d) > 3 * np.abs(p0)), 3 * p0, d)
+
+
+def _coeficientes_pchip(x, y, tramo=None):
+    """Coeficientes (a, b, c, d) por tramo de la PCHIP (Fritsch-Carlson); x estrictamente creciente"""
+    h = np.diff(x, axis=-1)
+    pendiente = np.diff(y, axis=-1) / h
+    derivadas = np.zeros(x.shape)
+    if x.shape[-1] == 2:
+        derivadas[..., 0] = derivadas[..., 1] = pendiente[..., 0]
+    else:
+        # Media armónica ponderada de las pendientes vecinas; cero en los extremos locales
+        p0, p1 = pendiente[..., :-1], pendiente[..., 1:]
+        w1 = 2 * h[..., 1:] + h[..., :-1]
+        w2 = h[..., 1:] + 2 * h[..., :-1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            interior = (w1 + w2) / (w1 / p0 + w2 / p1)
+        derivadas[..., 1:-1] = np.where((np.sign(p0) * np.sign(p1)) > 0, interior, 0.0)
+        derivadas[..., 0] = _derivada_borde(h[..., 0], h[..., 1], pendiente[..., 0], pendiente[..., 1])
+        derivadas[..., -1] = _derivada_borde(h[..., -1], h[..., -2], pendiente[..., -1], pendiente[..., -2])
+
+    h, pendiente, y0 = _tomar(h, tramo), _tomar(pendiente, tramo), _tomar(y[..., :-1], tramo)
+    d0, d1 = _tomar(derivadas[..., :-1], tramo), _tomar(derivadas[..., 1:], tramo)
+    return np.stack([y0, d0, (3 * pendiente - 2 * d0 - d1) / h, (d0 + d1 - 2 * pendiente) / h ** 2], axis=-1)
+
+
+CONSTRUCTORES = {'cubica': _coeficientes_cubica, 'pchip': _coeficientes_pchip}
+
+
+def _horner(coeficientes, t):
+    a, b, c, d = np.moveaxis(coeficientes, -1, 0)
+    return ((d * t + c) * t + b) * t + a
+
+
+class InterpolacionSpline:
+    """Spline cúbica natural o PCHIP sobre los valores distintos de x.
+
+    Con un solo valor distinto de x es constante; con dos, lineal. Fuera del
+    rango de los datos se extiende el polinomio del primer o último tramo.
+    """
+
+    def __init__(self, x, y, tipo='cubica', tam_bloque=65536, cache=None):
+        if tipo not in TIPOS_SPLINE:
+            raise ValueError(f"Tipo de spline desconocido: {tipo!r} (opciones: {TIPOS_SPLINE})")
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        self.n = len(self.x)
+        if self.n == 0:
+            raise ValueError("Se necesita al menos un punto")
+        self.tipo = tipo
+        self.tam_bloque = tam_bloque
+        self.cache = cache
+        self._huella = None
+
+        # Ordenar y agrupar una sola vez (misma tolerancia que IndiceNodos)
+        orden = np.argsort(self.x, kind='stable')
+        nuevo = np.empty(self.n, dtype=bool)
+        nuevo[0] = True
+        nuevo[1:] = np.diff(self.x[orden]) >= 1e-12
+        self.grupo = np.empty(self.n, dtype=np.intp)
+        self.grupo[orden] = np.cumsum(nuevo) - 1
+        inicio = np.flatnonzero(nuevo)
+        self.conteo = np.diff(np.r_[inicio, self.n])
+        self.suma_y = np.add.reduceat(self.y[orden], inicio)
+        self.nodos_x = self.x[orden][inicio]
+        self.nodos_y = self.suma_y / self.conteo
+
+        self.coeficientes = self._construir(self.nodos_x, self.nodos_y)
+
+    def _construir(self, x, y, tramo=None):
+        """Coeficientes (tramos, 4), o (filas, 4) del tramo pedido en cada fila; con un nodo, constante"""
+        if x.shape[-1] == 1:
+            y = y[..., 0] if tramo is not None else y
+            return np.stack([y, *(np.zeros(y.shape) for _ in range(3))], axis=-1)
+        return CONSTRUCTORES[self.tipo](x, y, tramo)
+
+    def evaluar(self, x_eval):
+        """Valor de la spline en un array de x (tramo por búsqueda binaria, cúbica por Horner)"""
+        x_eval = np.asarray(x_eval, dtype=np.float64)
+        tramo = np.clip(np.searchsorted(self.nodos_x, x_eval, side='right') - 1, 0, len(self.coeficientes) - 1)
+        return _horner(self.coeficientes[tramo], x_eval - self.nodos_x[tramo])
+
+    __call__ = evaluar
+
+    def _memorizar(self, partes, calcular):
+        """Usa la caché de resultados (si hay) con clave huella de x, y + partes"""
+        if self.cache is None:
+            return calcular()
+        if self._huella is None:
+            self._huella = self.cache.huella(self.x, self.y)
+        return self.cache.memorizar((self._huella,) + partes, calcular)
+
+    def calcular_error(self):
+        """Errores de dejar-uno-fuera con el formato de InterpolacionLagrange.calcular_error_grado"""
+        ventana = VENTANA_CUBICA if self.tipo == 'cubica' else VENTANA_PCHIP
+        return self._memorizar(('spline', self.tipo, ventana), lambda: self._calcular_error(ventana))
+
+    def _calcular_error(self, ventana):
+        estimado = np.full(self.n, np.nan)
+
+        # Con x repetida, la spline sin el punto sigue pasando por la media del resto del grupo
+        repetidos = self.conteo[self.grupo] > 1
+        grupo = self.grupo[repetidos]
+        estimado[repetidos] = (self.suma_y[grupo] - self.y[repetidos]) / (self.conteo[grupo] - 1)
+
+        unicos = np.flatnonzero(~repetidos)
+        if len(self.nodos_x) > 1 and len(unicos):
+            posiciones = self.grupo[unicos]
+            for inicio in range(0, len(unicos), self.tam_bloque):
+                bloque = slice(inicio, inicio + self.tam_bloque)
+                estimado[unicos[bloque]] = self._estimar_sin_nodo(posiciones[bloque], ventana)
+
+        errores, validos = error_porcentual(self.y, estimado)
+        return self.x, errores, np.where(validos, estimado, self.y)
+
+    def _estimar_sin_nodo(self, posiciones, ventana):
+        """Valor en cada nodo de la spline construida sobre una ventana de nodos que lo excluye"""
+        m = len(self.nodos_x)
+        largo = min(2 * ventana + 1, m)
+        # Ventana de `largo` nodos alrededor del excluido, desplazada para no salir de los datos
+        inicio = np.clip(posiciones - ventana, 0, m - largo)
+        indices = inicio[:, None] + np.arange(largo)
+        indices = indices[indices != posiciones[:, None]].reshape(len(posiciones), largo - 1)
+
+        x_ventana = self.nodos_x[indices]
+        x_eval = self.nodos_x[posiciones]
+        tramo = np.clip((x_ventana <= x_eval[:, None]).sum(axis=1) - 1, 0, max(largo - 3, 0))
+        coeficientes = self._construir(x_ventana, self.nodos_y[indices], tramo)
+        return _horner(coeficientes, x_eval - x_ventana[np.arange(len(posiciones)), tramo])
+
+    def mostrar_resultados(self, resultado=None):
+        """Muestra los errores de dejar-uno-fuera como InterpolacionLagrange.mostrar_resultados"""
+        x_puntos, errores, y_interp = resultado if resultado is not None else self.calcular_error()
+        nombre = 'CÚBICA NATURAL' if self.tipo == 'cubica' else 'MONÓTONA (PCHIP)'
+
+        print("\n" + "="*70)
+        print(f"SPLINE {nombre}")
+        print("="*70)
+        print(f"{'x':<10} {'y_real':<12} {'y_interp':<12} {'error %':<12}")
+        print("-" * 50)
+        for i in range(len(x_puntos)):
+            print(f"{x_puntos[i]:<10.4f} {self.y[i]:<12.4f} {y_interp[i]:<12.4f} {errores[i]:<12.4f}")
+        print(f"Error medio: {np.mean(errores):.4f} %")
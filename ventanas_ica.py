@@ -0,0 +1,442 @@
+"""Agregación del ICA por estación en ventanas de tiempo fijas (p. ej. mensuales) y móviles.
+
+Un IndiceEstaciones ordena las muestras una sola vez por (estación, tiempo) y
+guarda dónde empieza cada estación; sobre ese orden:
+
+- Ventanas fijas: cada (estación, periodo) es un tramo contiguo y sus
+  estadísticos salen con reduceat, sin volver a recorrer las muestras.
+- Ventanas móviles: el inicio y el fin de la ventana de cada muestra
+  avanzan solo hacia adelante, así que sumas y conteos salen de sumas
+  acumuladas y el mínimo/máximo de colas monótonas, en O(1) por muestra.
+  Las muestras con el mismo tiempo comparten ventana (todas entran en ella).
+- VentanaMovil hace lo mismo muestra a muestra para datos que llegan por
+  flujo (p. ej. desde ica_streaming), con altas y bajas en O(1).
+
+Uso típico:
+
+    python ventanas_ica.py muestras.csv --estacion Estacion --fecha Fecha --periodo M
+    python ventanas_ica.py muestras.csv --movil 30D --salida tendencia.csv
+"""
+
+import argparse
+import os
+import re
+from bisect import bisect_left
+from collections import deque
+
+import numpy as np
+
+from cache_resultados import DIRECTORIO_CACHE
+from cargadores import TAM_BLOQUE, cargar_columnas
+from ica_vectorizado import cargar_perfil, registro_predeterminado
+from instrumentacion import etapa
+
+
+def _a_tiempos(tiempos):
+    """Tiempos como array ordenable: datetime64 o números (los textos se interpretan como fechas)"""
+    tiempos = np.asarray(tiempos)
+    if tiempos.dtype.kind in 'OUS':
+        tiempos = tiempos.astype('datetime64[ns]')
+    return tiempos
+
+
+def _a_timedelta(duracion):
+    """timedelta64 de una duración '30D', '12h', '90m'... (meses y años no tienen largo fijo)"""
+    if isinstance(duracion, str):
+        partes = re.fullmatch(r'\s*(\d*)\s*([A-Za-z]+)\s*', duracion)
+        if partes is None:
+            raise ValueError(f"Duración no válida: {duracion!r} (p. ej. '30D', '12h')")
+        try:
+            duracion = np.timedelta64(int(partes.group(1) or 1), partes.group(2))
+        except (TypeError, ValueError):
+            raise ValueError(f"Unidad de duración desconocida: {partes.group(2)!r}") from None
+    duracion = np.timedelta64(duracion)
+    if np.datetime_data(duracion.dtype)[0] in ('M', 'Y'):
+        raise ValueError(f"Duración ambigua: {duracion} (meses y años no tienen largo fijo; use días, p. ej. '30D')")
+    return duracion
+
+
+def _a_duracion(duracion, tiempos):
+    """Duración en las unidades de los tiempos ('30D', '12h' o timedelta64 si son fechas)"""
+    if tiempos.dtype.kind == 'M':
+        return _a_timedelta(duracion).astype('timedelta64[ns]').astype(np.int64)
+    return float(duracion)
+
+
+class IndiceEstaciones:
+    """Índice groupby de las muestras: orden por (estación, tiempo) e inicio de cada estación"""
+
+    def __init__(self, estaciones, tiempos):
+        self.estaciones, self.codigos = np.unique(np.asarray(estaciones), return_inverse=True)
+        self.tiempos = _a_tiempos(tiempos)
+        if len(self.tiempos) != len(self.codigos):
+            raise ValueError("estaciones y tiempos deben tener el mismo largo")
+        with etapa('ventanas.indice'):
+            self.orden = np.lexsort((self.tiempos, self.codigos))
+            self.inicios = np.searchsorted(self.codigos[self.orden], np.arange(len(self.estaciones) + 1))
+
+    def __len__(self):
+        return len(self.orden)
+
+    def muestras(self, estacion):
+        """Índices de las muestras de una estación, en orden de tiempo"""
+        codigo = np.searchsorted(self.estaciones, estacion)
+        if codigo == len(self.estaciones) or self.estaciones[codigo] != estacion:
+            raise KeyError(estacion)
+        return self.orden[self.inicios[codigo]:self.inicios[codigo + 1]]
+
+    def periodos(self, periodo):
+        """Clave entera y comienzo del periodo de cada muestra (en el orden del índice)"""
+        tiempos = self.tiempos[self.orden]
+        if tiempos.dtype.kind == 'M':
+            comienzo = tiempos.astype(f'datetime64[{periodo}]')
+            return comienzo.astype(np.int64), comienzo
+        clave = np.floor(tiempos / float(periodo)).astype(np.int64)
+        return clave, clave * float(periodo)
+
+
+def _estadisticos_tramos(ica, qi, calidad, inicios, registro):
+    """Columnas de estadísticos por tramo contiguo [inicios[i], inicios[i+1]) de muestras ya ordenadas"""
+    validos = ~np.isnan(ica)
+    conteo_validos = np.add.reduceat(validos.astype(np.int64), inicios)
+    suma = np.add.reduceat(np.where(validos, ica, 0.0), inicios)
+    minimo = np.minimum.reduceat(np.where(validos, ica, np.inf), inicios)
+    maximo = np.maximum.reduceat(np.where(validos, ica, -np.inf), inicios)
+    muestras = np.diff(np.r_[inicios, len(ica)])
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        tabla = {
+            'muestras': muestras,
+            'ica_medio': suma / conteo_validos,
+            'ica_min': np.where(conteo_validos > 0, minimo, np.nan),
+            'ica_max': np.where(conteo_validos > 0, maximo, np.nan),
+        }
+    # Conteo por categoría con un solo bincount sobre (tramo, categoría)
+    tramo = np.repeat(np.arange(len(inicios)), muestras)
+    c = len(registro.categorias)
+    conteos = np.bincount(tramo * c + calidad, minlength=len(inicios) * c).reshape(len(inicios), c)
+    for j, nombre in enumerate(registro.categorias.tolist()):
+        tabla[nombre] = conteos[:, j]
+    qi, qi_validos = _separar_nan(qi)
+    _agregar_peor(tabla, np.add.reduceat(qi, inicios, axis=0), np.add.reduceat(qi_validos, inicios, axis=0),
+                  registro)
+    return tabla
+
+
+def _separar_nan(qi):
+    """Qi con los NaN en cero y la máscara (float) de los valores presentes"""
+    qi = np.asarray(qi, dtype=np.float64)
+    presentes = ~np.isnan(qi)
+    return np.where(presentes, qi, 0.0), presentes.astype(np.float64)
+
+
+def _agregar_peor(tabla, suma_qi, conteo_qi, registro):
+    """Parámetro con el Qi medio más bajo de cada ventana (sin contar los NaN) y ese Qi"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        qi_medio = suma_qi / conteo_qi
+    peor = np.argmin(np.where(np.isnan(qi_medio), np.inf, qi_medio), axis=1)
+    tabla['peor_parametro'] = np.array(registro.claves)[peor]
+    tabla['qi_peor'] = qi_medio[np.arange(len(peor)), peor]
+
+
+def ventanas_fijas(indice, ica, qi, periodo='M', registro=registro_predeterminado):
+    """Estadísticos por estación y periodo (ventanas fijas, sin solaparse).
+
+    periodo es una unidad de datetime64 ('D', 'W', 'M', 'Y', 'h') si los
+    tiempos son fechas, o un ancho en sus unidades si son números. Devuelve
+    un DataFrame con una fila por (estación, periodo) con muestras: ICA
+    medio, mínimo y máximo, conteo por categoría y el peor parámetro (Qi
+    medio más bajo).
+    """
+    import pandas as pd
+
+    with etapa('ventanas.fijas'):
+        clave, comienzo = indice.periodos(periodo)
+        codigos = indice.codigos[indice.orden]
+        nuevo = np.ones(len(indice), dtype=bool)
+        nuevo[1:] = (codigos[1:] != codigos[:-1]) | (clave[1:] != clave[:-1])
+        inicios = np.flatnonzero(nuevo)
+
+        ica = np.asarray(ica, dtype=np.float64)[indice.orden]
+        tabla = {'estacion': indice.estaciones[codigos[inicios]], 'periodo': comienzo[inicios]}
+        tabla.update(_estadisticos_tramos(ica, np.asarray(qi)[indice.orden],
+                                          registro.indices_calidad(ica), inicios, registro))
+        return pd.DataFrame(tabla)
+
+
+def _limites_moviles(indice, duracion, max_muestras):
+    """Posiciones (en el orden del índice) donde empieza y termina (exclusiva) la ventana de cada muestra"""
+    inicios = np.empty(len(indice), dtype=np.intp)
+    fines = np.empty(len(indice), dtype=np.intp)
+    tiempos = indice.tiempos[indice.orden]
+    if tiempos.dtype.kind == 'M':
+        tiempos = tiempos.astype('datetime64[ns]').astype(np.int64)
+    if duracion is not None:
+        duracion = _a_duracion(duracion, indice.tiempos)
+    for a, b in zip(indice.inicios[:-1], indice.inicios[1:]):
+        t = tiempos[a:b]
+        # La ventana termina en la última muestra con el mismo tiempo: los empates no dependen del orden
+        fin = a + np.searchsorted(t, t, side='right')
+        inicio = np.full(b - a, a)
+        if duracion is not None:
+            # Ventana (t - duracion, t]
+            inicio = np.maximum(inicio, a + np.searchsorted(t, t - duracion, side='right'))
+        if max_muestras is not None:
+            inicio = np.maximum(inicio, fin - max_muestras)
+        inicios[a:b] = inicio
+        fines[a:b] = fin
+    return inicios, fines
+
+
+def _extremos_moviles(valores, inicios, fines):
+    """Mínimo y máximo de valores[inicios[i]:fines[i]] con colas monótonas (NaN se ignora)"""
+    valores = valores.tolist()
+    inicios = inicios.tolist()
+    fines = fines.tolist()
+    minimos, maximos = deque(), deque()
+    minimo = [np.nan] * len(valores)
+    maximo = [np.nan] * len(valores)
+    siguiente = 0
+    for i, (inicio, fin) in enumerate(zip(inicios, fines)):
+        while siguiente < fin:
+            v = valores[siguiente]
+            if v == v:
+                while minimos and valores[minimos[-1]] >= v:
+                    minimos.pop()
+                minimos.append(siguiente)
+                while maximos and valores[maximos[-1]] <= v:
+                    maximos.pop()
+                maximos.append(siguiente)
+            siguiente += 1
+        while minimos and minimos[0] < inicio:
+            minimos.popleft()
+        while maximos and maximos[0] < inicio:
+            maximos.popleft()
+        if minimos:
+            minimo[i] = valores[minimos[0]]
+            maximo[i] = valores[maximos[0]]
+    return np.array(minimo), np.array(maximo)
+
+
+def _sumas_moviles(valores, inicios, fines, tam_bloque):
+    """Suma de valores[inicios[i]:fines[i]] (por filas) con sumas acumuladas por bloques de muestras"""
+    resultado = np.empty(valores.shape)
+    for a in range(0, len(valores), tam_bloque):
+        b = min(a + tam_bloque, len(valores))
+        # inicios y fines no decrecen: el bloque usa valores[inicios[a]:fines[b - 1]]
+        desde, hasta = inicios[a], fines[b - 1]
+        acumulada = np.zeros((hasta - desde + 1,) + valores.shape[1:])
+        np.cumsum(valores[desde:hasta], axis=0, out=acumulada[1:])
+        resultado[a:b] = acumulada[fines[a:b] - desde] - acumulada[inicios[a:b] - desde]
+    return resultado
+
+
+def ventanas_moviles(indice, ica, qi, duracion=None, max_muestras=None,
+                     registro=registro_predeterminado, tam_bloque=TAM_BLOQUE):
+    """Estadísticos de la ventana móvil que termina en cada muestra de su estación.
+
+    La ventana abarca (t - duracion, t] y a lo sumo max_muestras muestras
+    (basta con uno de los dos), incluidas todas las de tiempo t; duracion acepta '30D', '12h' o un
+    timedelta64 si los tiempos son fechas. Devuelve un DataFrame en el orden
+    original de las muestras con las mismas columnas que ventanas_fijas.
+    """
+    import pandas as pd
+
+    if duracion is None and max_muestras is None:
+        raise ValueError("Indique duracion o max_muestras")
+    with etapa('ventanas.moviles'):
+        orden = indice.orden
+        inicios, fines = _limites_moviles(indice, duracion, max_muestras)
+        ica = np.asarray(ica, dtype=np.float64)[orden]
+        validos = ~np.isnan(ica)
+        calidad = registro.indices_calidad(ica)
+
+        conteo_validos = _sumas_moviles(validos.astype(np.float64), inicios, fines, tam_bloque)
+        suma = _sumas_moviles(np.where(validos, ica, 0.0), inicios, fines, tam_bloque)
+        muestras = fines - inicios
+        minimo, maximo = _extremos_moviles(ica, inicios, fines)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            tabla = {'muestras': muestras, 'ica_medio': suma / conteo_validos,
+                     'ica_min': minimo, 'ica_max': maximo}
+        una_caliente = np.zeros((len(indice), len(registro.categorias)))
+        una_caliente[np.arange(len(indice)), calidad] = 1.0
+        conteos = np.rint(_sumas_moviles(una_caliente, inicios, fines, tam_bloque)).astype(np.int64)
+        for j, nombre in enumerate(registro.categorias.tolist()):
+            tabla[nombre] = conteos[:, j]
+        qi, qi_validos = _separar_nan(np.asarray(qi)[orden])
+        _agregar_peor(tabla, _sumas_moviles(qi, inicios, fines, tam_bloque),
+                      np.rint(_sumas_moviles(qi_validos, inicios, fines, tam_bloque)), registro)
+
+        # De vuelta al orden original
+        inversa = np.empty_like(orden)
+        inversa[orden] = np.arange(len(orden))
+        resultado = {'estacion': indice.estaciones[indice.codigos], 'tiempo': indice.tiempos,
+                     'ica': ica[inversa]}
+        resultado.update({k: v[inversa] for k, v in tabla.items()})
+        return pd.DataFrame(resultado)
+
+
+class VentanaMovil:
+    """Ventana móvil de una estación alimentada muestra a muestra (altas y bajas en O(1)).
+
+    Pensada para flujos: guarda solo las muestras dentro de la ventana y
+    mantiene sumas, conteos por categoría, sumas de Qi y colas monótonas
+    para el mínimo y el máximo. Los tiempos deben llegar en orden; con
+    tiempos repetidos cada muestra ve solo las que ya llegaron (al llegar la
+    última del empate coincide con ventanas_moviles).
+    """
+
+    def __init__(self, duracion=None, max_muestras=None, registro=registro_predeterminado):
+        if duracion is None and max_muestras is None:
+            raise ValueError("Indique duracion o max_muestras")
+        # Los textos ('30D') se comparan como timedelta64 con la diferencia de dos fechas
+        self.duracion = _a_timedelta(duracion) if isinstance(duracion, str) else duracion
+        self.max_muestras = max_muestras
+        self.registro = registro
+        self.muestras = deque()
+        self.validos = 0
+        self.suma = 0.0
+        self.conteo = [0] * len(registro.categorias)
+        self.suma_qi = np.zeros(len(registro.claves))
+        self.conteo_qi = np.zeros(len(registro.claves))
+        self._minimos = deque()
+        self._maximos = deque()
+        self._agregadas = 0
+        self._retiradas = 0
+
+    def agregar(self, tiempo, ica, qi):
+        """Agrega una muestra y retira las que quedan fuera de la ventana"""
+        ica = float(ica)
+        # Igual que RegistroICA.indices_calidad, sin pasar por arrays
+        categoria = bisect_left(self.registro.limites_calidad, ica) if ica == ica else 0
+        qi, presentes = _separar_nan(qi)
+        self.muestras.append((tiempo, ica, categoria, qi, presentes))
+        self.conteo[categoria] += 1
+        self.suma_qi += qi
+        self.conteo_qi += presentes
+        if ica == ica:
+            self.validos += 1
+            self.suma += ica
+            while self._minimos and self._minimos[-1][1] >= ica:
+                self._minimos.pop()
+            self._minimos.append((self._agregadas, ica))
+            while self._maximos and self._maximos[-1][1] <= ica:
+                self._maximos.pop()
+            self._maximos.append((self._agregadas, ica))
+        self._agregadas += 1
+
+        while (self.max_muestras is not None and len(self.muestras) > self.max_muestras) or (
+                self.duracion is not None and tiempo - self.muestras[0][0] >= self.duracion):
+            self._retirar()
+
+    def _retirar(self):
+        _, ica, categoria, qi, presentes = self.muestras.popleft()
+        self.conteo[categoria] -= 1
+        self.suma_qi -= qi
+        self.conteo_qi -= presentes
+        if ica == ica:
+            self.validos -= 1
+            self.suma -= ica
+        if self._minimos and self._minimos[0][0] == self._retiradas:
+            self._minimos.popleft()
+        if self._maximos and self._maximos[0][0] == self._retiradas:
+            self._maximos.popleft()
+        self._retiradas += 1
+
+    def estadisticos(self):
+        """Estadísticos actuales con las mismas claves que las columnas de ventanas_moviles"""
+        n = len(self.muestras)
+        resultado = {
+            'muestras': n,
+            'ica_medio': self.suma / self.validos if self.validos else np.nan,
+            'ica_min': self._minimos[0][1] if self._minimos else np.nan,
+            'ica_max': self._maximos[0][1] if self._maximos else np.nan,
+            **dict(zip(self.registro.categorias.tolist(), self.conteo)),
+        }
+        if n:
+            tabla = {}
+            _agregar_peor(tabla, self.suma_qi[None], self.conteo_qi[None], self.registro)
+            resultado['peor_parametro'] = str(tabla['peor_parametro'][0])
+            resultado['qi_peor'] = float(tabla['qi_peor'][0])
+        return resultado
+
+
+class VentanasEstaciones:
+    """Una VentanaMovil por estación, actualizada por bloques (p. ej. los de ica_streaming)"""
+
+    def __init__(self, duracion=None, max_muestras=None, registro=registro_predeterminado):
+        self.duracion = duracion
+        self.max_muestras = max_muestras
+        self.registro = registro
+        self.ventanas = {}
+
+    def actualizar(self, estaciones, tiempos, ica, qi):
+        """Agrega un bloque de muestras y devuelve los estadísticos de cada una tras agregarla"""
+        resultados = []
+        for estacion, tiempo, valor, fila in zip(estaciones, tiempos, ica, qi):
+            ventana = self.ventanas.get(estacion)
+            if ventana is None:
+                ventana = self.ventanas[estacion] = VentanaMovil(self.duracion, self.max_muestras, self.registro)
+            ventana.agregar(tiempo, valor, fila)
+            resultados.append(ventana.estadisticos())
+        return resultados
+
+
+# --- Entrada desde archivo ---
+
+def _leer_claves(ruta, columna_estacion, columna_tiempo):
+    """Columnas de estación y tiempo del archivo (las de ICA van por cargar_columnas)"""
+    import pandas as pd
+
+    extension = os.path.splitext(ruta)[1].lower()
+    columnas = [columna_estacion, columna_tiempo]
+    if extension == '.csv':
+        datos = pd.read_csv(ruta, usecols=columnas)
+    elif extension in ('.parquet', '.pq'):
+        datos = pd.read_parquet(ruta, columns=columnas)
+    else:
+        datos = pd.read_excel(ruta, usecols=columnas)
+    tiempos = datos[columna_tiempo]
+    if tiempos.dtype.kind not in 'iufM':
+        tiempos = pd.to_datetime(tiempos)
+    return datos[columna_estacion].astype(str).to_numpy(), tiempos.to_numpy()
+
+
+def cargar_muestras(ruta, columna_estacion='Estacion', columna_tiempo='Fecha', registro=registro_predeterminado,
+                    directorio_cache=DIRECTORIO_CACHE):
+    """Índice por estación, ICA y matriz Qi de todas las muestras de un archivo"""
+    estaciones, tiempos = _leer_claves(ruta, columna_estacion, columna_tiempo)
+    datos = cargar_columnas(ruta, registro.columnas_ica, filtrar_nan=False, directorio_cache=directorio_cache)
+    ica, _, qi = registro.calcular_ica(datos)
+    return IndiceEstaciones(estaciones, tiempos), ica, qi
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ICA por estación en ventanas fijas o móviles")
+    parser.add_argument('entrada', help="archivo xlsx/csv/parquet con las columnas de ICA, estación y fecha")
+    parser.add_argument('--estacion', default='Estacion', help="columna de la estación")
+    parser.add_argument('--fecha', default='Fecha', help="columna del tiempo de la muestra")
+    parser.add_argument('--periodo', default='M', help="ventanas fijas: D, W, M, Y (o un ancho numérico)")
+    parser.add_argument('--movil', help="ventana móvil por duración (p. ej. 30D) en vez de ventanas fijas")
+    parser.add_argument('--max-muestras', type=int, help="ventana móvil de las últimas N muestras")
+    parser.add_argument('--salida', help="archivo .csv (por defecto, consola)")
+    parser.add_argument('--perfil', default='predeterminado',
+                        help="perfil de parámetros (nombre en perfiles_ica/ o ruta a un JSON)")
+    args = parser.parse_args()
+    registro = cargar_perfil(args.perfil)
+
+    indice, ica, qi = cargar_muestras(args.entrada, args.estacion, args.fecha, registro)
+    if args.movil or args.max_muestras:
+        tabla = ventanas_moviles(indice, ica, qi, args.movil, args.max_muestras, registro)
+    else:
+        periodo = args.periodo if args.periodo.isalpha() else float(args.periodo)
+        tabla = ventanas_fijas(indice, ica, qi, periodo, registro)
+
+    if args.salida:
+        tabla.to_csv(args.salida, index=False)
+    else:
+        print(tabla.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+
+
+if __name__ == "__main__":
+    main()